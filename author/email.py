@@ -1,4 +1,4 @@
-from common.email import send_journal_email
+from common.notifications import notify
 from django.conf import settings
 from django.urls import reverse
 
@@ -21,44 +21,40 @@ actions. Thanks!
 """
 
 def notify_user_revision_transitioned_from_unsubmitted_to_waiting_for_authors(revision):
-    for authorship in revision.manuscript.authorships.filter(acknowledged=False).all():
+    for authorship in revision.manuscript.authorships.filter(acknowledged=False).select_related('author__profile'):
         author = authorship.author
-        if author.email:
-            send_journal_email(
-                "You were listed as a co-author",
-                UNSUBMITTED_TO_WAITING_FOR_AUTHORS_EMAIL.format(
-                    author.first_name, 
-                    revision.title,
-                    settings.JOURNAL_EMAIL_BASE_URL + reverse(
-                        'author:show_revision',
-                        args=(revision.manuscript.id, revision.revision_number)
-                    ),
+        notify(
+            author,
+            "You were listed as a co-author",
+            UNSUBMITTED_TO_WAITING_FOR_AUTHORS_EMAIL.format(
+                author.first_name, 
+                revision.title,
+                settings.JOURNAL_EMAIL_BASE_URL + reverse(
+                    'author:show_revision',
+                    args=(revision.manuscript.id, revision.revision_number)
                 ),
-                [author.email],
-            )
+            ),
+        )
     
 def notify_user_revision_transitioned_from_unsubmitted_to_pending(revision):
-    for author in revision.manuscript.authors.all():
-        if author.email:
-            send_journal_email(
-                "Your manuscript was submitted",
-                UNSUBMITTED_TO_PENDING_EMAIL.format(
-                    author.first_name, 
-                    revision.title,
-                ),
-                [author.email],
-            )
+    for author in revision.manuscript.authors.select_related('profile'):
+        notify(
+            author,
+            "Your manuscript was submitted",
+            UNSUBMITTED_TO_PENDING_EMAIL.format(
+                author.first_name, 
+                revision.title,
+            ),
+        )
     
 def notify_user_revision_transitioned_from_pending_to_decided(revision):
-    for author in revision.manuscript.authors.all():
-        if author.email:
-            send_journal_email(
-                "Your manuscript has a decision",
-                PENDING_TO_DECIDED_EMAIL.format(
-                    author.first_name, 
-                    revision.title,
-                    settings.JOURNAL_EMAIL_BASE_URL + reverse('author:home'),
-                ),
-                [author.email],
-            )
-    
+    for author in revision.manuscript.authors.select_related('profile'):
+        notify(
+            author,
+            "Your manuscript has a decision",
+            PENDING_TO_DECIDED_EMAIL.format(
+                author.first_name, 
+                revision.title,
+                settings.JOURNAL_EMAIL_BASE_URL + reverse('author:home'),
+            ),
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from author.models import Revision
+from author.revision_text import compact_revisions, expand_revisions, verify_revisions
+
+class Command(BaseCommand):
+    help = (
+        "Checks that every revision stored as a delta can be rebuilt exactly. With --compact, "
+        "first stores superseded revisions as deltas; with --expand, stores every revision in "
+        "full again, for example before turning REVISION_TEXT_DELTAS off."
+    )
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--compact', action='store_true',
+                help="Store superseded revisions as deltas against their predecessors")
+        group.add_argument('--expand', action='store_true',
+                help="Store every revision in full")
+
+    def handle(self, *args, **options):
+        if options['compact']:
+            self.stdout.write("Compacted {} revisions.".format(compact_revisions(Revision)))
+        elif options['expand']:
+            self.stdout.write("Expanded {} revisions.".format(expand_revisions(Revision)))
+        broken = verify_revisions(Revision)
+        for revision in Revision.objects.filter(pk__in=broken).select_related('manuscript'):
+            self.stdout.write("Manuscript {} revision {} cannot be rebuilt".format(
+                    revision.manuscript_id, revision.revision_number))
+        if broken:
+            raise CommandError("{} revisions cannot be rebuilt".format(len(broken)))
+        self.stdout.write("All revisions can be rebuilt.")
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0007_auto_20210917_1327'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manuscript',
+            name='current_revision',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='author.revision'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_revision(apps, schema_editor):
+    "Points each manuscript at its newest revision."
+    Manuscript = apps.get_model('author', 'Manuscript')
+    Revision = apps.get_model('author', 'Revision')
+    newest = Revision.objects.filter(manuscript=OuterRef('pk')).order_by('-pk').values('pk')[:1]
+    Manuscript.objects.update(current_revision=Subquery(newest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0008_manuscript_current_revision'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_current_revision, migrations.RunPython.noop),
+    ]
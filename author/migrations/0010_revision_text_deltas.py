@@ -0,0 +1,41 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:39
+
+import author.revision_text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def compact_existing_revisions(apps, schema_editor):
+    "Stores existing superseded revisions as deltas, if delta storage is on."
+    if settings.REVISION_TEXT_DELTAS:
+        author.revision_text.compact_revisions(apps.get_model('author', 'Revision'))
+
+
+def expand_revisions(apps, schema_editor):
+    "Stores every revision in full, so the delta columns can be dropped."
+    author.revision_text.expand_revisions(apps.get_model('author', 'Revision'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('author', '0009_backfill_manuscript_current_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revision',
+            name='text_delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='revision',
+            name='text_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='revision',
+            name='text',
+            field=author.revision_text.RevisionTextField(null=True),
+        ),
+        migrations.RunPython(compact_existing_revisions, expand_revisions),
+    ]
@@ -28,20 +28,31 @@ class ManuscriptRevisionMixin:
     """A mixin which overrides `get_object` to look up a revision nested within
     a manuscript. Populates `manuscript` and `revision` in template context.
     Expects `manuscript_pk` and `revision_number` in url kwargs.
+
+    The revision is looked up once per request and cached on the view; call
+    `invalidate_revision` after changing its state.
     """
     def get_object(self, queryset=None):
-        "Looks up a revision by manuscript id and revision_number."
-        qs = queryset or self.get_queryset()
-        try:
-            return qs.get(
-                manuscript__id=self.kwargs['manuscript_pk'],
-                revision_number=self.kwargs['revision_number']
-            )
-        except Revision.DoesNotExist:
-            raise Http404("No such revision")
-
-    def get_revision(self):
-        return self.get_object()
+        return self.get_revision(queryset)
+
+    def get_revision(self, queryset=None):
+        """Looks up a revision by manuscript id and revision_number, annotated 
+        with its capabilities so that templates can check them without queries.
+        """
+        if getattr(self, '_revision', None) is None:
+            qs = (queryset or self.get_queryset()).select_related('manuscript').with_capabilities()
+            try:
+                self._revision = qs.get(
+                    manuscript__id=self.kwargs['manuscript_pk'],
+                    revision_number=self.kwargs['revision_number']
+                )
+            except Revision.DoesNotExist:
+                raise Http404("No such revision")
+        return self._revision
+
+    def invalidate_revision(self):
+        "Discards the cached revision, whose annotations may now be stale."
+        self._revision = None
 
     def get_manuscript(self):
         return self.get_revision().manuscript
@@ -53,4 +64,3 @@ class ManuscriptRevisionMixin:
         ctx['revision'] = revision
         ctx['manuscript'] = revision.manuscript
         return ctx
-
@@ -1,33 +1,33 @@
 from datetime import datetime
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
 from tinymce.models import HTMLField
-from common.models import NondeletedManager
-from django.db.models import Q, Count
+from common.models import NondeletedManager, KanbanQuerySetMixin
+from . import revision_text
+from django.db.models import Exists, OuterRef
 from enum import Enum, auto
 
-class ManuscriptQuerySet(models.QuerySet):
-    def count_reviews(self, name, **kwargs):
-        "Annotates the query with a count of reviews, optionally filtered."
-        filter_kwargs = {'revisions__reviews__' + k : v for k, v in kwargs.items()}
-        agg = Count('revisions__reviews', filter=Q(**filter_kwargs))
-        return self.annotate(**{name: agg})
+class ManuscriptQuerySet(KanbanQuerySetMixin, models.QuerySet):
+    kanban_status_field = 'current_revision__status'
+
+    def get_kanban_assignment(self):
+        return Revision.KANBAN_ASSIGNMENT
 
 class ManuscriptManager(models.Manager):
     "A manager which uses ManuscriptQuerySet and which filters out deleted"
     def get_queryset(self):
         return ManuscriptQuerySet(self.model, using=self._db).filter(deleted=False)
 
-    def count_reviews(self, name, **kwargs):
-        return self.get_queryset().count_reviews(name, **kwargs)
-
 class Manuscript(models.Model):
     authors = models.ManyToManyField(User, through="author.ManuscriptAuthorship", related_name="manuscripts")
     reviewers = models.ManyToManyField(User, through="reviewer.ManuscriptReviewer", 
             related_name="reviewed_manuscripts")
     deleted = models.BooleanField(default=False)
+    current_revision = models.ForeignKey('author.Revision', on_delete=models.SET_NULL,
+            blank=True, null=True, related_name='+')
 
     objects = ManuscriptManager()
 
@@ -40,13 +40,21 @@ class Manuscript(models.Model):
     def has_unacknowledged_authors(self):
         return self.authors.filter(manuscriptauthorship__acknowledged=False).exists()
 
+    def set_current_revision(self, revision):
+        """Points `current_revision` at the manuscript's newest revision.
+        This must be called whenever a revision is created, so that views can
+        read the current revision without querying `revisions`.
+        """
+        self.current_revision = revision
+        self.save(update_fields=['current_revision'])
+
     def can_assign_reviewer(self):
         "Whether it is possible to assign a reviewer to this manuscript"
-        return self.revisions.last().status == Revision.StatusChoices.PENDING
+        return self.current_revision.status == Revision.StatusChoices.PENDING
 
     def short_title(self):
         "Someday will appropriately shorten the title"
-        return self.revisions.last().title
+        return self.current_revision.title
 
     def author_names(self):
         return self.format_names(self.authors.all())
@@ -62,14 +70,10 @@ class Manuscript(models.Model):
             return ', '.join(authors[:-1]) + ' and ' + authors[-1]
 
     def status_message(self):
-        return self.revisions.last().status_message()
+        return self.current_revision.status_message()
 
     def kanban_column(self):
-        return Revision.KANBAN_ASSIGNMENT[self.revisions.last().status]
-
-    @classmethod
-    def in_kanban_columns(self, manuscripts):
-        return {col: [m for m in manuscripts if m.kanban_column() == col] for col in Revision.KanbanColumns}
+        return Revision.KANBAN_ASSIGNMENT[self.current_revision.status]
 
 class ManuscriptAuthorship(models.Model):
     manuscript = models.ForeignKey(Manuscript, on_delete=models.CASCADE,
@@ -77,6 +81,34 @@ class ManuscriptAuthorship(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     acknowledged = models.BooleanField(default=False)
 
+class RevisionQuerySet(models.QuerySet):
+    def with_capabilities(self):
+        """Annotates the flags which Revision's capability methods (`can_submit`,
+        `can_withdraw`, `can_create_new_revision`, etc.) would otherwise query 
+        for. These are computed as EXISTS subqueries in the same SELECT that 
+        loads the revisions; the remaining capabilities depend only on the 
+        revision's own columns.
+        """
+        from reviewer.models import Review
+        reviews_underway = Review.objects.filter(
+            revision=OuterRef('pk'),
+            status__in=Revision.REVIEW_UNDERWAY_STATES,
+        )
+        later_revisions = Revision.objects.filter(
+            manuscript=OuterRef('manuscript'),
+            revision_number__gt=OuterRef('revision_number'),
+        )
+        prior_decisions = Revision.objects.filter(
+            manuscript=OuterRef('manuscript'),
+            revision_number__lt=OuterRef('revision_number'),
+            status__in=Revision.DECISION_STATES,
+        )
+        return self.annotate(
+            annotated_has_reviews_underway=Exists(reviews_underway),
+            annotated_has_later_revision=Exists(later_revisions),
+            annotated_has_prior_decision=Exists(prior_decisions),
+        )
+
 class Revision(models.Model):
     timeformat = "%A %B %-d, %Y at %-I:%M %p"
 
@@ -96,7 +128,9 @@ class Revision(models.Model):
     title = models.CharField(max_length=200)
     revision_number = models.IntegerField()
     revision_note = HTMLField(blank=True, null=True)
-    text = HTMLField()
+    text = revision_text.RevisionTextField(null=True)
+    text_delta = models.JSONField(blank=True, null=True)
+    text_hash = models.CharField(max_length=64, blank=True)
     editorial_review = HTMLField(blank=True, null=True)
     date_created = models.DateTimeField()
     date_submitted = models.DateTimeField(blank=True, null=True)
@@ -105,6 +139,36 @@ class Revision(models.Model):
     status = models.CharField(max_length=20, choices=StatusChoices.choices,
             default=StatusChoices.UNSUBMITTED)
 
+    objects = RevisionQuerySet.as_manager()
+
+    REVIEW_UNDERWAY_STATES = ['SUBMITTED', 'COMPLETE', 'EDIT_REQUESTED']
+    DECISION_STATES = [
+        StatusChoices.REJECT, 
+        StatusChoices.MINOR_REVISION, 
+        StatusChoices.MAJOR_REVISION,
+        StatusChoices.ACCEPT, 
+        StatusChoices.PUBLISHED, 
+    ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        revision = super().from_db(db, field_names, values)
+        revision_text.loaded(revision)
+        return revision
+
+    def save(self, *args, **kwargs):
+        """When text stored as a delta is changed, the revision is stored in 
+        full again, as is the revision after it if that is a delta against it.
+        """
+        update_fields = kwargs.get('update_fields')
+        if revision_text.text_changed(self) and (update_fields is None or 'text' in update_fields):
+            revision_text.expand_successor(self)
+            self.text_delta, self.text_hash = None, ''
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'text_delta', 'text_hash'}
+        super().save(*args, **kwargs)
+        revision_text.saved(self)
+
     def __str__(self):
         return '"{}" by {} (v{} {})'.format(
             self.title, 
@@ -154,13 +218,18 @@ class Revision(models.Model):
             status = Revision.StatusChoices.WAITING_FOR_AUTHORS
         else:
             status = Revision.StatusChoices.UNSUBMITTED
-        return self.manuscript.revisions.create(
+        revision = self.manuscript.revisions.create(
             title=self.title,
             text=self.text,
             revision_number=self.revision_number + 1,
             date_created=timezone.now(),
             status=status,
         )
+        self.manuscript.set_current_revision(revision)
+        if settings.REVISION_TEXT_DELTAS:
+            revision_text.compact_revisions(Revision, [self.manuscript_id])
+            self.refresh_from_db(fields=['text_delta', 'text_hash'])
+        return revision
 
     def can_submit(self):
         is_unsubmitted = (self.status == self.StatusChoices.UNSUBMITTED)
@@ -168,8 +237,9 @@ class Revision(models.Model):
         return is_unsubmitted and has_revision_note_if_needed
 
     def has_reviews_underway(self):
-        review_underway_states = ['SUBMITTED', 'COMPLETE', 'EDIT_REQUESTED']
-        return self.reviews.filter(status__in=review_underway_states).count()
+        if hasattr(self, 'annotated_has_reviews_underway'):
+            return self.annotated_has_reviews_underway
+        return self.reviews.filter(status__in=self.REVIEW_UNDERWAY_STATES).exists()
 
     def is_withdrawn(self):
         return self.status == self.StatusChoices.WITHDRAWN
@@ -185,19 +255,23 @@ class Revision(models.Model):
             self.StatusChoices.MINOR_REVISION,
             self.StatusChoices.MAJOR_REVISION,
         ]
-        later_revisions = self.manuscript.revisions.filter(revision_number__gt=self.revision_number)
-        return self.status in valid_statuses and not later_revisions.exists()
+        return self.status in valid_statuses and not self.has_later_revision()
+
+    def has_later_revision(self):
+        if hasattr(self, 'annotated_has_later_revision'):
+            return self.annotated_has_later_revision
+        return Revision.objects.filter(
+            manuscript_id=self.manuscript_id,
+            revision_number__gt=self.revision_number,
+        ).exists()
 
     def has_prior_decision(self):
-        return self.manuscript.revisions.filter(
+        if hasattr(self, 'annotated_has_prior_decision'):
+            return self.annotated_has_prior_decision
+        return Revision.objects.filter(
+            manuscript_id=self.manuscript_id,
             revision_number__lt=self.revision_number,
-            status__in=[
-                self.StatusChoices.REJECT, 
-                self.StatusChoices.MINOR_REVISION, 
-                self.StatusChoices.MAJOR_REVISION,
-                self.StatusChoices.ACCEPT, 
-                self.StatusChoices.PUBLISHED, 
-            ],
+            status__in=self.DECISION_STATES,
         ).exists()
 
     def can_edit(self):
@@ -233,8 +307,3 @@ class Revision(models.Model):
 
     def kanban_column(self):
         return self.KANBAN_ASSIGNMENT[self.status]
-
-    @classmethod
-    def in_kanban_columns(self, revisions):
-        return {col: [r for r in revisions if r.kanban_column() == col] for col in self.KanbanColumns}
-
@@ -0,0 +1,191 @@
+"""Delta storage for revision text.
+
+Each revision of a manuscript usually differs little from the one before it,
+so with `REVISION_TEXT_DELTAS` on, a revision superseded by a newer one is
+stored as a delta against its predecessor: a list of operations, each either
+[start, end], copying a range of the predecessor's tokens, or a string to
+insert. Revision 0, every `REVISION_TEXT_SNAPSHOT_INTERVAL`th revision and the
+current revision (which authors still edit and the public site shows) are
+stored in full, so rebuilding a revision's text reads at most a few rows.
+A delta row's `text` column is NULL and its `text_hash` is the sha256 of its
+full text, which `verify_revisions` checks.
+
+`RevisionTextField` rebuilds delta-stored text the first time `Revision.text`
+is read, and keeps it in the cache.
+"""
+import json
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+from hashlib import sha256
+from itertools import groupby
+from operator import itemgetter
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.query_utils import DeferredAttribute
+from tinymce.models import HTMLField
+
+TOKEN_BOUNDARY = re.compile(r'(?<=>)|(?<=\n)')
+
+# Keys in a revision's __dict__ tracking how its text is stored
+TEXT_PENDING = '_text_pending'
+STORED_TEXT = '_stored_text'
+
+def tokenize(text):
+    "Splits HTML after each tag and line break; joining the tokens gives the text back"
+    return [token for token in TOKEN_BOUNDARY.split(text) if token]
+
+def make_delta(old, new):
+    "The operations which build `new` from the tokens of `old`"
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    delta = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, old_tokens, new_tokens).get_opcodes():
+        if op == 'equal':
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append(''.join(new_tokens[j1:j2]))
+    return delta
+
+def apply_delta(old, delta):
+    tokens = tokenize(old)
+    return ''.join(''.join(tokens[op[0]:op[1]]) if isinstance(op, list) else op for op in delta)
+
+def text_hash(text):
+    return sha256(text.encode('utf-8')).hexdigest()
+
+def is_snapshot(revision_number, interval=None):
+    "Whether a revision is always stored in full"
+    return revision_number % (interval or settings.REVISION_TEXT_SNAPSHOT_INTERVAL) == 0
+
+def predecessor_text(model, manuscript_id, revision_number):
+    "Rebuilds the text of the revision before `revision_number` from its nearest full predecessor"
+    deltas = []
+    rows = (model.objects.filter(manuscript_id=manuscript_id, revision_number__lt=revision_number)
+            .order_by('-revision_number').values_list('text', 'text_delta'))
+    for text, delta in rows.iterator():
+        if text is not None:
+            break
+        deltas.append(delta)
+    else:
+        raise ValueError("Revision {} of manuscript {} has no full predecessor".format(
+                revision_number, manuscript_id))
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+def rebuild_text(revision):
+    "The full text of a revision stored as a delta, from the cache if it has been rebuilt before"
+    key = 'revision-text:{}:{}'.format(revision.pk, revision.text_hash)
+    text = cache.get(key)
+    if text is None:
+        previous = predecessor_text(type(revision), revision.manuscript_id, revision.revision_number)
+        text = apply_delta(previous, revision.text_delta)
+        cache.set(key, text, settings.REVISION_TEXT_CACHE_TIMEOUT)
+    return text
+
+class RevisionTextDescriptor(DeferredAttribute):
+    "Rebuilds text stored as a delta the first time it is read"
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        if instance.__dict__.pop(TEXT_PENDING, False):
+            text = rebuild_text(instance)
+            instance.__dict__[self.field.attname] = text
+            instance.__dict__[STORED_TEXT] = text
+        return super().__get__(instance, cls)
+
+class RevisionTextField(HTMLField):
+    """Revision text, which is NULL in the database when the revision is
+    stored as a delta. Saving a revision whose text has not changed leaves
+    its delta in place.
+    """
+    descriptor_class = RevisionTextDescriptor
+
+    def pre_save(self, model_instance, add):
+        if model_instance.__dict__.get('text_delta') is not None:
+            return None
+        return super().pre_save(model_instance, add)
+
+def loaded(revision):
+    """Called as a revision is loaded. Text stored as a delta is left to be
+    rebuilt when it is read; full text is remembered, to tell if it changes.
+    """
+    if 'text' not in revision.__dict__:
+        return
+    if revision.__dict__['text'] is None:
+        del revision.__dict__['text']
+        revision.__dict__[TEXT_PENDING] = True
+    else:
+        revision.__dict__[STORED_TEXT] = revision.__dict__['text']
+
+def saved(revision):
+    if 'text' in revision.__dict__:
+        revision.__dict__[STORED_TEXT] = revision.__dict__['text']
+
+def text_changed(revision):
+    "Whether a saved revision's text has been assigned since it was loaded or saved"
+    data = revision.__dict__
+    return STORED_TEXT in data and 'text' in data and data['text'] is not data[STORED_TEXT]
+
+def expand_successor(revision):
+    """Stores the revision after this one in full if it is a delta, since its
+    delta is against this revision's text, which is about to change.
+    """
+    model = type(revision)
+    successor = model.objects.filter(manuscript_id=revision.manuscript_id,
+            revision_number=revision.revision_number + 1, text__isnull=True).first()
+    if successor:
+        model.objects.filter(pk=successor.pk).update(text=successor.text, text_delta=None, text_hash='')
+
+StoredText = namedtuple('StoredText', ['pk', 'revision_number', 'text', 'text_delta', 'text_hash',
+        'previous_text', 'superseded'])
+
+def stored_texts(model, manuscript_ids=None):
+    """Yields each revision's storage and full text, rebuilding deltas in one
+    pass over the table. Text which cannot be rebuilt is None. Works on rows
+    rather than instances, so migrations can use it.
+    """
+    rows = model.objects.order_by('manuscript_id', 'revision_number')
+    if manuscript_ids is not None:
+        rows = rows.filter(manuscript_id__in=manuscript_ids)
+    rows = rows.values_list('pk', 'manuscript_id', 'revision_number', 'text', 'text_delta', 'text_hash')
+    for manuscript_id, group in groupby(rows.iterator(), key=itemgetter(1)):
+        group = list(group)
+        previous = None
+        for i, (pk, manuscript_id, number, text, delta, digest) in enumerate(group):
+            if text is None:
+                try:
+                    text = apply_delta(previous, delta)
+                except (TypeError, ValueError, IndexError):
+                    text = None
+            yield StoredText(pk, number, text, delta, digest, previous, i < len(group) - 1)
+            previous = text
+
+def compact_revisions(model, manuscript_ids=None, interval=None):
+    """Stores each superseded revision which is not due a full snapshot as a
+    delta against its predecessor, unless the delta would be no smaller.
+    Returns the number of revisions compacted.
+    """
+    compacted = []
+    for row in stored_texts(model, manuscript_ids):
+        if (row.superseded and row.text_delta is None and row.text is not None
+                and row.previous_text is not None and not is_snapshot(row.revision_number, interval)):
+            delta = make_delta(row.previous_text, row.text)
+            if len(json.dumps(delta)) < len(row.text):
+                compacted.append((row.pk, delta, text_hash(row.text)))
+    for pk, delta, digest in compacted:
+        model.objects.filter(pk=pk).update(text=None, text_delta=delta, text_hash=digest)
+    return len(compacted)
+
+def expand_revisions(model, manuscript_ids=None):
+    "Stores every revision in full again. Returns the number of revisions expanded."
+    expanded = [(row.pk, row.text) for row in stored_texts(model, manuscript_ids) 
+            if row.text_delta is not None and row.text is not None]
+    for pk, text in expanded:
+        model.objects.filter(pk=pk).update(text=text, text_delta=None, text_hash='')
+    return len(expanded)
+
+def verify_revisions(model, manuscript_ids=None):
+    "Returns the pks of revisions stored as deltas whose text cannot be rebuilt exactly"
+    return [row.pk for row in stored_texts(model, manuscript_ids) if row.text_delta is not None
+            and (row.text is None or text_hash(row.text) != row.text_hash)]
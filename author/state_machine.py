@@ -4,34 +4,48 @@ from django.contrib import messages
 from django.conf import settings
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Q
 import logging
 from .models import Revision
 from reviewer.models import Review
 from reviewer.state_machine import ReviewStateMachine
-from reviewer.assignment import ranked_reviewers
-from reviewer.email import notify_user_when_review_created
-from author.email import (
-    notify_user_revision_transitioned_from_unsubmitted_to_waiting_for_authors,
-    notify_user_revision_transitioned_from_unsubmitted_to_pending,
-    notify_user_revision_transitioned_from_pending_to_decided,
+from common.outbox import enqueue
+from .tasks import (
+    notify_unacknowledged_authors,
+    notify_authors_of_submission,
+    notify_authors_of_decision,
+    assign_reviewers,
 )
 
-logger = logging.getLogger("cognitive_apprenticeship.analytics")
 main_logger = logging.getLogger(__name__)
 
 class RevisionStateMachine(StateMachine):
     """Handles Revision state transitions and their side effects.
     """
     states = Revision.StatusChoices
+    state_field = 'status'
+    model_name = 'Revision'
 
     def get_state(self, rev):
         return rev.status
 
+    def transition_fields(self, old_state, new_state):
+        "Timestamps set by each transition"
+        if new_state == self.states.PENDING:
+            return {'date_submitted': timezone.now()}
+        elif new_state == self.states.PUBLISHED:
+            return {'date_published': timezone.now()}
+        elif new_state == self.states.WITHDRAWN or new_state in Revision.DECISION_STATES:
+            return {'date_decided': timezone.now()}
+        return {}
+
     def unsubmitted_to_waiting_for_authors(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         rev.status = self.states.WAITING_FOR_AUTHORS
-        rev.save()
-        notify_user_revision_transitioned_from_unsubmitted_to_waiting_for_authors(rev)
+        with transaction.atomic():
+            rev.save()
+            enqueue(notify_unacknowledged_authors, revision_id=rev.id)
             
     def unsubmitted_to_pending(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
@@ -40,24 +54,11 @@ class RevisionStateMachine(StateMachine):
         else:
             msg = '"{}" has been submitted. You will be notified once reviewers provide feedback.'
         self.flash_authors(rev, msg.format(rev.title))
-        rev.status = new_state
-        rev.date_submitted = timezone.now()
-        rev.save()
-        notify_user_revision_transitioned_from_unsubmitted_to_pending(rev)
-        if settings.AUTOMATICALLY_ASSIGN_REVIEWERS:
-            num_reviewers_needed = max(0, settings.NUMBER_OF_REVIEWERS - rev.manuscript.reviewers.count())
-            reviewer_pool = ranked_reviewers(rev.manuscript.authors.all(), rev.manuscript.reviewers.all())
-            if len(reviewer_pool) >= num_reviewers_needed:
-                rev.manuscript.reviewers.add(*reviewer_pool[:num_reviewers_needed])
-            else:
-                msg = "Not enough reviewers for manuscript {}".format(rev.manuscript_id)
-                main_logger.warning("Not enough reviewers for manuscript {}".format(rev.manuscript_id))
-        for reviewer in rev.manuscript.reviewers.all():
-            if not rev.reviews.filter(reviewer=reviewer).exists():
-                review = Review(revision=rev, reviewer=reviewer, 
-                        date_due=due_date(settings.DAYS_TO_REVIEW))
-                review.save()
-                notify_user_when_review_created(review)
+        self.set_state(rev, old_state, new_state)
+        with transaction.atomic():
+            rev.save()
+            enqueue(assign_reviewers, revision_id=rev.id)
+            enqueue(notify_authors_of_submission, revision_id=rev.id)
 
     def waiting_for_authors_to_unsubmitted(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
@@ -68,12 +69,13 @@ class RevisionStateMachine(StateMachine):
     def pending_to_withdrawn(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         self.flash_authors(rev, "{} has been withdrawn and will not be reviewed.".format(rev.title))
-        rev.status = new_state
-        rev.date_decided = timezone.now()
-        rev.save()
-        review_state_machine = ReviewStateMachine(self.request)
-        for review in rev.reviews.filter(status=Review.StatusChoices.ASSIGNED).all():
-            review_state_machine.transition(review, Review.StatusChoices.WITHDRAWN)
+        self.set_state(rev, old_state, new_state)
+        with transaction.atomic():
+            rev.save()
+            ReviewStateMachine(self.request).transition_many(
+                rev.reviews.filter(status=Review.StatusChoices.ASSIGNED),
+                Review.StatusChoices.WITHDRAWN,
+            )
 
     def pending_to_accept(self, rev, old_state, new_state):
         self._decision_transition(rev, old_state, new_state)
@@ -90,37 +92,40 @@ class RevisionStateMachine(StateMachine):
     def accept_to_published(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         self.flash_authors(rev, "{} has been published!".format(rev.title))
-        rev.status = new_state
-        rev.date_published = timezone.now()
+        self.set_state(rev, old_state, new_state)
         rev.save()
 
     def _decision_transition(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         self.flash_authors(rev, "{} has reviews and a decision.".format(rev.title))
-        rev.status = new_state
-        rev.date_decided = timezone.now()
-        rev.save()
-        review_state_machine = ReviewStateMachine(self.request) 
-        for review in rev.reviews.all():
-            if review.status in [Review.StatusChoices.ASSIGNED, Review.StatusChoices.EDIT_REQUESTED]:
-                if review.date_due < timezone.now():
-                    review_state_machine.transition(review, Review.StatusChoices.EXPIRED)
-                else:
-                    review_state_machine.transition(review, Review.StatusChoices.NOT_NEEDED)
-            elif review.status == Review.StatusChoices.SUBMITTED:
-                review_state_machine.transition(review, Review.StatusChoices.COMPLETE)
-        notify_user_revision_transitioned_from_pending_to_decided(rev)
-
-    def log_state_transition(self, rev, old_state, new_state):
-        msg = "Revision {} transitioned from {} to {}".format(rev.id, old_state, new_state)
-        logger.info(msg, extra={
-            'event': 'state_transition',
-            'old_state': old_state,
-            'new_state': new_state,
-            'model': 'Revision',
-            'user': self.request.user.username if self.request else None,
-            'id': rev.id,
-        })
+        self.set_state(rev, old_state, new_state)
+        with transaction.atomic():
+            rev.save()
+            self.close_reviews(rev)
+            enqueue(notify_authors_of_decision, revision_id=rev.id)
+
+    def close_reviews(self, rev):
+        """Once a decision is made, submitted reviews are complete and open 
+        reviews are no longer needed, or expired if they were overdue.
+        """
+        review_state_machine = ReviewStateMachine(self.request)
+        now = timezone.now()
+        open_reviews = rev.reviews.filter(status__in=[
+            Review.StatusChoices.ASSIGNED, 
+            Review.StatusChoices.EDIT_REQUESTED,
+        ])
+        review_state_machine.transition_many(
+            open_reviews.filter(date_due__lt=now), 
+            Review.StatusChoices.EXPIRED,
+        )
+        review_state_machine.transition_many(
+            open_reviews.filter(Q(date_due__gte=now) | Q(date_due__isnull=True)), 
+            Review.StatusChoices.NOT_NEEDED,
+        )
+        review_state_machine.transition_many(
+            rev.reviews.filter(status=Review.StatusChoices.SUBMITTED), 
+            Review.StatusChoices.COMPLETE,
+        )
 
     def flash_authors(self, rev, message, level=messages.INFO):
         "Sets a flash message if the current user is an author of the revision"
@@ -0,0 +1,57 @@
+"""Side effects of revision transitions. These are queued in the outbox in the
+same transaction as the transition, and run later by `drain_outbox`.
+"""
+import logging
+from django.conf import settings
+from common.due_date import due_date
+from common.outbox import enqueue
+from reviewer.models import Review
+from reviewer.assignment import ranked_reviewers
+from reviewer.workload import record_reviews_created
+from reviewer.interactions import record_reviewed_authors
+from reviewer.tasks import notify_reviewer
+from .models import Revision
+from .email import (
+    notify_user_revision_transitioned_from_unsubmitted_to_waiting_for_authors,
+    notify_user_revision_transitioned_from_unsubmitted_to_pending,
+    notify_user_revision_transitioned_from_pending_to_decided,
+)
+
+logger = logging.getLogger(__name__)
+
+def notify_unacknowledged_authors(revision_id):
+    revision = Revision.objects.select_related('manuscript').get(pk=revision_id)
+    notify_user_revision_transitioned_from_unsubmitted_to_waiting_for_authors(revision)
+
+def notify_authors_of_submission(revision_id):
+    revision = Revision.objects.select_related('manuscript').get(pk=revision_id)
+    notify_user_revision_transitioned_from_unsubmitted_to_pending(revision)
+
+def notify_authors_of_decision(revision_id):
+    revision = Revision.objects.select_related('manuscript').get(pk=revision_id)
+    notify_user_revision_transitioned_from_pending_to_decided(revision)
+
+def assign_reviewers(revision_id):
+    """When AUTOMATICALLY_ASSIGN_REVIEWERS is set, tops the manuscript up to 
+    NUMBER_OF_REVIEWERS. Then creates a review for each of the manuscript's 
+    reviewers who does not yet have one, and queues their notifications.
+    Does nothing if the revision is no longer pending, and is safe to repeat.
+    """
+    rev = Revision.objects.select_for_update().select_related('manuscript').get(pk=revision_id)
+    if rev.status != Revision.StatusChoices.PENDING:
+        return
+    if settings.AUTOMATICALLY_ASSIGN_REVIEWERS:
+        num_reviewers_needed = max(0, settings.NUMBER_OF_REVIEWERS - rev.manuscript.reviewers.count())
+        reviewer_pool = ranked_reviewers(rev.manuscript.authors.all(), rev.manuscript.reviewers.all())
+        if len(reviewer_pool) >= num_reviewers_needed:
+            rev.manuscript.reviewers.add(*reviewer_pool[:num_reviewers_needed])
+        else:
+            logger.warning("Not enough reviewers for manuscript {}".format(rev.manuscript_id))
+    has_review = set(rev.reviews.values_list('reviewer_id', flat=True))
+    for reviewer in rev.manuscript.reviewers.all():
+        if reviewer.id not in has_review:
+            review = Review.objects.create(revision=rev, reviewer=reviewer, 
+                    date_due=due_date(settings.DAYS_TO_REVIEW))
+            record_reviews_created([review])
+            record_reviewed_authors([review])
+            enqueue(notify_reviewer, review_id=review.id)
@@ -1,3 +1,230 @@
-from django.test import TestCase
+import importlib
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from datetime import timedelta
+from io import StringIO
+from django.utils import timezone
+from author.models import Revision
+from reviewer.models import Review
+from reviewer.workload import workload_drift, rebuild_workload_counters
+from author.state_machine import RevisionStateMachine
+from author.revision_text import make_delta, apply_delta, verify_revisions, expand_revisions
+from editor.tests import make_user, make_manuscript
 
-# Create your tests here.
+CAPABILITIES = [
+    'can_submit',
+    'can_withdraw',
+    'has_reviews_underway',
+    'can_create_new_revision',
+    'has_prior_decision',
+    'can_edit',
+    'should_show_reviews_to_author',
+]
+
+class RevisionCapabilitiesTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+        self.reviewer = make_user("reviewer", is_reviewer=True)
+
+    def assert_capabilities_match(self, revision):
+        plain = Revision.objects.get(pk=revision.pk)
+        annotated = Revision.objects.with_capabilities().get(pk=revision.pk)
+        for capability in CAPABILITIES:
+            self.assertEqual(
+                bool(getattr(plain, capability)()),
+                bool(getattr(annotated, capability)()),
+                capability
+            )
+        return annotated
+
+    def test_annotations_match_queries(self):
+        m = make_manuscript([self.author], Revision.StatusChoices.MAJOR_REVISION, [self.reviewer])
+        first = m.current_revision
+        Review.objects.update(status=Review.StatusChoices.COMPLETE)
+        annotated = self.assert_capabilities_match(first)
+        self.assertTrue(annotated.can_create_new_revision())
+        second = first.create_new_revision()
+        annotated = self.assert_capabilities_match(first)
+        self.assertFalse(annotated.can_create_new_revision())
+        annotated = self.assert_capabilities_match(second)
+        self.assertTrue(annotated.has_prior_decision())
+        self.assertFalse(annotated.can_submit())
+
+    def test_pending_revision_with_reviews_underway(self):
+        m = make_manuscript([self.author], Revision.StatusChoices.PENDING, [self.reviewer])
+        self.assertTrue(self.assert_capabilities_match(m.current_revision).can_withdraw())
+        Review.objects.update(status=Review.StatusChoices.SUBMITTED)
+        annotated = self.assert_capabilities_match(m.current_revision)
+        self.assertTrue(annotated.has_reviews_underway())
+        self.assertFalse(annotated.can_withdraw())
+
+    def test_capabilities_use_annotations(self):
+        m = make_manuscript([self.author], Revision.StatusChoices.PENDING, [self.reviewer])
+        revision = Revision.objects.with_capabilities().get(pk=m.current_revision.pk)
+        with self.assertNumQueries(0):
+            for capability in CAPABILITIES:
+                getattr(revision, capability)()
+
+class CurrentRevisionTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+
+    def test_current_revision_tracks_newest_revision(self):
+        m = make_manuscript([self.author], Revision.StatusChoices.MINOR_REVISION)
+        first = m.current_revision
+        second = first.create_new_revision()
+        m.refresh_from_db()
+        self.assertEqual(m.current_revision, second)
+        self.assertEqual(m.current_revision, m.revisions.order_by('-revision_number').first())
+
+    def test_backfill_points_at_highest_pk_revision(self):
+        migration = importlib.import_module('author.migrations.0009_backfill_manuscript_current_revision')
+        m = make_manuscript([self.author], Revision.StatusChoices.MINOR_REVISION)
+        second = m.current_revision.create_new_revision()
+        other = make_manuscript([self.author])
+        type(m).objects.filter(pk__in=[m.pk, other.pk]).update(current_revision=None)
+        migration.backfill_current_revision(apps, None)
+        m.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(m.current_revision, second)
+        self.assertEqual(other.current_revision, other.revisions.get())
+
+class ShowRevisionTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+        self.client.force_login(self.author)
+
+    def count_queries(self, manuscript):
+        url = reverse('author:show_revision', args=(manuscript.id, 0))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_depend_on_history(self):
+        few = self.count_queries(make_manuscript([self.author], Revision.StatusChoices.PENDING))
+        m = make_manuscript([self.author], Revision.StatusChoices.MINOR_REVISION)
+        revision = m.current_revision
+        for i in range(5):
+            revision = revision.create_new_revision()
+            revision.status = Revision.StatusChoices.MINOR_REVISION
+            revision.date_decided = timezone.now()
+            revision.save()
+        self.assertEqual(few, self.count_queries(m))
+
+class DetailViewQueriesTest(TestCase):
+    "Each detail view should look up the revision once and cost a fixed number of queries"
+    expected_queries = {
+        'author:show_revision': 7,
+        'author:show_revision_reviews': 8,
+        'author:edit_revision': 5,
+    }
+
+    def test_query_counts(self):
+        author = make_user("author", is_author=True)
+        reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(2)]
+        m = make_manuscript([author], Revision.StatusChoices.UNSUBMITTED, reviewers)
+        self.client.force_login(author)
+        for name, expected in self.expected_queries.items():
+            with self.subTest(name), self.assertNumQueries(expected):
+                response = self.client.get(reverse(name, args=(m.id, 0)))
+                self.assertEqual(response.status_code, 200)
+
+class DecisionTransitionTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+        self.reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(4)]
+        self.manuscript = make_manuscript([self.author], reviewers=self.reviewers)
+        self.reviews = list(Review.objects.order_by('reviewer__username'))
+        future = timezone.now() + timedelta(days=1)
+        statuses = ['SUBMITTED', 'ASSIGNED', 'ASSIGNED', 'EDIT_REQUESTED']
+        for review, status in zip(self.reviews, statuses):
+            review.status = status
+            review.date_due = future
+        self.reviews[1].date_due = timezone.now() - timedelta(days=1)
+        Review.objects.bulk_update(self.reviews, ['status', 'date_due'])
+        rebuild_workload_counters()
+
+    def test_decision_closes_reviews(self):
+        RevisionStateMachine().transition(self.manuscript.current_revision, Revision.StatusChoices.ACCEPT)
+        statuses = list(Review.objects.order_by('reviewer__username').values_list('status', flat=True))
+        self.assertEqual(statuses, ['COMPLETE', 'EXPIRED', 'NOT_NEEDED', 'NOT_NEEDED'])
+        self.assertIsNotNone(Review.objects.get(status='EXPIRED').date_closed)
+        self.assertEqual(workload_drift(), [])
+
+    def test_withdrawal_withdraws_assigned_reviews(self):
+        RevisionStateMachine().transition(self.manuscript.current_revision, Revision.StatusChoices.WITHDRAWN)
+        statuses = list(Review.objects.order_by('reviewer__username').values_list('status', flat=True))
+        self.assertEqual(statuses, ['SUBMITTED', 'WITHDRAWN', 'WITHDRAWN', 'EDIT_REQUESTED'])
+        self.assertEqual(workload_drift(), [])
+
+def revision_texts(n):
+    "Texts of n revisions, each editing one paragraph of the one before"
+    paragraphs = ["<p>Paragraph {} of a long manuscript.</p>\n".format(i) for i in range(20)]
+    texts = []
+    for i in range(n):
+        paragraphs[i] = "<p>Paragraph {} as of revision {}.</p>\n".format(i, i)
+        texts.append(''.join(paragraphs))
+    return texts
+
+@override_settings(REVISION_TEXT_DELTAS=True, REVISION_TEXT_SNAPSHOT_INTERVAL=3)
+class RevisionTextDeltaTest(TestCase):
+    def setUp(self):
+        author = make_user("author", is_author=True)
+        self.texts = revision_texts(5)
+        self.manuscript = make_manuscript([author], Revision.StatusChoices.MINOR_REVISION)
+        revision = self.manuscript.current_revision
+        revision.text = self.texts[0]
+        revision.save()
+        for text in self.texts[1:]:
+            revision = revision.create_new_revision()
+            revision.text = text
+            revision.status = Revision.StatusChoices.MINOR_REVISION
+            revision.save()
+
+    def stored(self):
+        return list(Revision.objects.filter(manuscript=self.manuscript).order_by('revision_number')
+                .values_list('text', flat=True))
+
+    def test_delta_roundtrip(self):
+        for old, new in zip(self.texts, self.texts[1:] + ["", "<p>Other</p>"]):
+            self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_superseded_revisions_are_stored_as_deltas(self):
+        full = [text is not None for text in self.stored()]
+        self.assertEqual(full, [True, False, False, True, True])
+        for revision in Revision.objects.filter(manuscript=self.manuscript):
+            self.assertEqual(revision.text, self.texts[revision.revision_number])
+        self.assertEqual(verify_revisions(Revision), [])
+
+    def test_rebuilt_text_is_cached(self):
+        revision = Revision.objects.get(manuscript=self.manuscript, revision_number=2)
+        revision.text
+        revision = Revision.objects.get(pk=revision.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(revision.text, self.texts[2])
+
+    def test_saving_keeps_deltas_unless_text_changes(self):
+        revision = Revision.objects.get(manuscript=self.manuscript, revision_number=1)
+        revision.save()
+        revision.text
+        revision.save()
+        self.assertIsNone(self.stored()[1])
+        revision.text = "<p>Edited in the admin</p>"
+        revision.save()
+        self.assertEqual(self.stored()[1:3], ["<p>Edited in the admin</p>", self.texts[2]])
+        self.assertEqual(Revision.objects.get(pk=revision.pk).text, "<p>Edited in the admin</p>")
+        self.assertEqual(verify_revisions(Revision), [])
+
+    def test_verify_and_expand(self):
+        call_command('revision_text', stdout=StringIO())
+        Revision.objects.filter(manuscript=self.manuscript, revision_number=2).update(text_hash='0' * 64)
+        with self.assertRaises(CommandError):
+            call_command('revision_text', stdout=StringIO())
+        self.assertEqual(expand_revisions(Revision), 2)
+        self.assertEqual(self.stored(), self.texts)
@@ -11,6 +11,8 @@ from django.utils import timezone
 from .models import Manuscript, ManuscriptAuthorship, Revision
 from .forms import NewManuscriptForm, EditRevisionForm, EditResubmittedRevisionForm
 from .state_machine import RevisionStateMachine
+from common.kanban import paginate_kanban_columns
+from reviewer.interactions import record_authorships_acknowledged
 from .mixins import (
     AuthorMixin,
     ManuscriptRevisionMixin,
@@ -20,8 +22,9 @@ class AuthorHome(AuthorMixin, TemplateView):
     template_name = "author/home.html"
     
     def get_context_data(self):
-        my_manuscripts = Manuscript.objects.filter(authors=self.request.user).all()
-        return {col.name: mss for col, mss in Manuscript.in_kanban_columns(my_manuscripts).items()}
+        my_manuscripts = (Manuscript.objects.filter(authors=self.request.user)
+                .select_related('current_revision').prefetch_related('authors'))
+        return paginate_kanban_columns(my_manuscripts, Revision.KanbanColumns, self.request)
 
 class AuthorInstructions(AuthorMixin, TemplateView):
     template_name = "author/instructions.html"
@@ -52,6 +55,7 @@ class NewManuscript(AuthorMixin, FormView):
                         text=form.cleaned_data['text'],
                         date_created=timezone.now(),
                     )
+                    manuscript.set_current_revision(revision)
                     if manuscript.has_unacknowledged_authors():
                         sm = RevisionStateMachine()
                         sm.transition(revision, sm.states.WAITING_FOR_AUTHORS)
@@ -68,11 +72,11 @@ class ShowManuscript(AuthorMixin, DetailView):
     model = Manuscript
 
     def get_queryset(self):
-        return Manuscript.objects.filter(authors=self.request.user)
+        return Manuscript.objects.filter(authors=self.request.user).select_related('current_revision')
 
     def get(self, request, *args, **kwargs):
         m = self.get_object()
-        return redirect('author:show_revision', m.id, m.revisions.last().revision_number)
+        return redirect('author:show_revision', m.id, m.current_revision.revision_number)
 
 class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
     http_method_names = ['get', 'post']
@@ -83,7 +87,7 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
         c = super().get_context_data(*args, **kwargs)
         revision = self.get_object()
         m = revision.manuscript
-        missing_authorships = m.authorships.filter(acknowledged=False).all()
+        missing_authorships = m.authorships.filter(acknowledged=False).select_related('author')
         missing_authors = [authorship.author for authorship in missing_authorships]
 
         c['is_waiting_for_authors'] = (len(missing_authors) > 0)
@@ -120,6 +124,7 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
         if action == "SUBMIT" or action == "RESUBMIT":
             try:
                 sm.transition(revision, sm.states.PENDING)
+                self.invalidate_revision()
                 return redirect_to_revision
             except sm.IllegalTransition:
                 return self.forbid_action("submit")
@@ -128,6 +133,7 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
                 return self.forbid_action("withdraw")
             try:
                 sm.transition(revision, sm.states.WITHDRAWN)
+                self.invalidate_revision()
                 return redirect_to_revision
             except sm.IllegalTransition:
                 return self.forbid_action("withdraw")
@@ -135,6 +141,7 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
             if self.can_acknowledge_authorship():
                 self.acknowledge_authorship()
                 sm.transition(revision, sm.states.UNSUBMITTED)
+                self.invalidate_revision()
                 return redirect_to_revision
             else:
                 return self.forbid_action("acknowledge authorship")
@@ -164,7 +171,9 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
             author=self.request.user
         )
         authorship.acknowledged = True
-        authorship.save()
+        with transaction.atomic():
+            authorship.save()
+            record_authorships_acknowledged([authorship])
         message = "You acknowledged authorship of this manuscript."
         messages.add_message(self.request, messages.INFO, message)
         return redirect(
@@ -176,6 +185,7 @@ class ShowRevision(AuthorMixin, ManuscriptRevisionMixin, DetailView):
     def create_new_revision(self):
         revision = self.get_object()
         new_revision = revision.create_new_revision()
+        self.invalidate_revision()
         message = "You have created a new revision."
         messages.add_message(self.request, messages.INFO, message)
         return redirect(
@@ -92,6 +92,19 @@ DATABASES = {
     }
 }
 
+# Rendered public pages are shared by all worker processes, so they need a
+# cache which is shared too.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'public_pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'page_cache',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -124,15 +137,17 @@ LOGGING = {
     },  
     'handlers': {
         'analytics': {
-            'class': 'logging.FileHandler',
+            'class': 'common.log_handlers.QueuedFileHandler',
             'level': 'INFO',
             'filename': 'analytics.log',
+            'queueSize': 10000,
             'formatter': 'json'
         },
         'email': {
-            'class': 'logging.FileHandler',
+            'class': 'common.log_handlers.QueuedFileHandler',
             'level': 'INFO',
             'filename': 'email.log',
+            'queueSize': 10000,
             'formatter': 'json'
         },
     },
@@ -164,6 +179,7 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / "static_root"
+STATICFILES_STORAGE = 'common.storage.HashedStaticFilesStorage'
 TINYMCE_JS_URL = STATIC_URL + "/js/tinymce/tinymce.min.js"
 #TINYMCE_JS_ROOT = str(STATIC_ROOT / "js" / "tinymce")
 #TINYMCE_COMPRESSOR = False
@@ -198,20 +214,40 @@ DAYS_TO_EDIT_REVIEW = 3
 DAYS_ON_EXTENSION = 1
 NUMBER_OF_REVIEWERS = 2
 AUTOMATICALLY_ASSIGN_REVIEWERS = True
+REVIEWERS_EXCLUDE_COAUTHORS = False
+KANBAN_COLUMN_PAGE_SIZE = 25
+PUBLIC_PAGE_CACHE = 'public_pages'
+PUBLIC_PAGE_PROXY_MAX_AGE = 60 * 60 * 24 # seconds a fronting proxy may serve a public page
+REVISION_TEXT_DELTAS = False # store superseded revisions as deltas against their predecessors
+REVISION_TEXT_SNAPSHOT_INTERVAL = 4 # every nth revision is stored in full
+REVISION_TEXT_CACHE_TIMEOUT = 60 * 60 * 24 # seconds rebuilt revision text is cached
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60 # seconds, doubling with each attempt
 
 SEND_JOURNAL_EMAIL = False
 JOURNAL_EMAIL_SUBJECT_PREFIX = "[CISL Journal] "
 JOURNAL_EMAIL_SENDER = "chris.proctor@gmail.com"
 JOURNAL_EMAIL_BASE_URL = "https://cisljournal.net"
+JOURNAL_EMAIL_BATCH_SIZE = 50
+JOURNAL_EMAIL_RATE_LIMIT = 100 # per minute
+JOURNAL_EMAIL_MAX_ATTEMPTS = 5
+JOURNAL_EMAIL_RETRY_DELAY = 60 # seconds, doubling with each attempt
+JOURNAL_EMAIL_LOG_BODIES = True
+NOTIFICATION_DIGEST_MINUTES = 60 # None sends each notification immediately
 
 EMAIL_SUBJECT_PREFIX = "[CISL Journal] "
 
 SITE_FROZEN = False
 DISTILL_PUBLISH = {
     'default': {
-        'ENGINE': 'django_distill.backends.amazon_s3',
+        'ENGINE': 'public.s3_backend',
         'PUBLIC_URL': 'https://cisljournal.net',
         'ACCESS_KEY_ID': '...',
         'SECRET_ACCESS_KEY': '...',
+        'BUCKET': '...',
     }
 }
+EXPORT_COMPRESS_EXTENSIONS = ['.html', '.css', '.js']
+EXPORT_PAGE_CACHE_CONTROL = "public, max-age=300"
+EXPORT_ASSET_CACHE_CONTROL = "public, max-age=3600"
+EXPORT_HASHED_ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
@@ -1,28 +1,102 @@
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 import logging
-from datetime import datetime
+import traceback
+from datetime import datetime, timedelta
+from .models import QueuedEmail
 
 logger = logging.getLogger("cognitive_apprenticeship.email")
 
 def send_journal_email(subject, body, recipients):
-    """Sends an email and logs the result.
+    """Queues an email and logs the result.
     This function should be used to send all email throughout the application so
-    that it can be managed centrally.
+    that it can be managed centrally. Queued emails are sent by the
+    `send_queued_email` command, which reuses one connection for many emails.
+    Bodies are left out of the log when JOURNAL_EMAIL_LOG_BODIES is False.
     """
     msg = "Email to {}: {}".format(recipients, subject)
-    logger.info(msg, extra={
+    extra = {
         'recipients': recipients,
         'sender': settings.JOURNAL_EMAIL_SENDER,
         'subject': subject,
-        'body': body,
         'timestamp': datetime.now(),
         'sent': settings.SEND_JOURNAL_EMAIL,
-    })
+    }
+    if settings.JOURNAL_EMAIL_LOG_BODIES:
+        extra['body'] = body
+    logger.info(msg, extra=extra)
     if settings.SEND_JOURNAL_EMAIL:
-        send_mail(
-            settings.JOURNAL_EMAIL_SUBJECT_PREFIX + subject,
-            body, 
-            settings.JOURNAL_EMAIL_SENDER, 
-            recipients,
+        QueuedEmail.objects.create(
+            subject=settings.JOURNAL_EMAIL_SUBJECT_PREFIX + subject,
+            body=body,
+            sender=settings.JOURNAL_EMAIL_SENDER,
+            recipients=list(recipients),
         )
+
+def pending_emails(now=None):
+    "Emails which are unsent, are due to be tried, and have attempts left"
+    return QueuedEmail.objects.filter(
+        date_sent__isnull=True,
+        date_available__lte=now or timezone.now(),
+        attempts__lt=settings.JOURNAL_EMAIL_MAX_ATTEMPTS,
+    )
+
+def sending_capacity(now=None):
+    "How many more emails may be sent this minute under JOURNAL_EMAIL_RATE_LIMIT"
+    now = now or timezone.now()
+    sent = QueuedEmail.objects.filter(date_sent__gt=now - timedelta(minutes=1)).count()
+    return max(0, settings.JOURNAL_EMAIL_RATE_LIMIT - sent)
+
+def record_failure(email):
+    "Counts a failed attempt and schedules the email's retry, with exponential backoff"
+    email.attempts += 1
+    email.last_error = traceback.format_exc()
+    delay = settings.JOURNAL_EMAIL_RETRY_DELAY * 2 ** (email.attempts - 1)
+    email.date_available = timezone.now() + timedelta(seconds=delay)
+
+def send_queued_email_batch(connection=None):
+    """Sends up to JOURNAL_EMAIL_BATCH_SIZE pending emails over a single
+    connection, staying within JOURNAL_EMAIL_RATE_LIMIT. Emails locked by
+    another worker are skipped. An email which fails is retried after
+    JOURNAL_EMAIL_RETRY_DELAY seconds, doubling with each attempt, until it has
+    been tried JOURNAL_EMAIL_MAX_ATTEMPTS times. If the connection cannot be
+    opened, every email in the batch counts as failed.
+    Returns a tuple of the numbers of emails sent and failed.
+    """
+    size = min(settings.JOURNAL_EMAIL_BATCH_SIZE, sending_capacity())
+    if not size:
+        return 0, 0
+    sent, failed = 0, 0
+    with transaction.atomic():
+        emails = list(pending_emails().select_for_update(skip_locked=True).order_by('pk')[:size])
+        if not emails:
+            return 0, 0
+        connection = connection or get_connection()
+        try:
+            connection.open()
+        except Exception:
+            logger.exception("Failed to connect to send {} emails".format(len(emails)))
+            for email in emails:
+                record_failure(email)
+            failed = len(emails)
+        else:
+            try:
+                for email in emails:
+                    message = EmailMessage(email.subject, email.body, email.sender,
+                            email.recipients, connection=connection)
+                    try:
+                        connection.send_messages([message])
+                    except Exception:
+                        logger.exception("Failed to send {}".format(email))
+                        record_failure(email)
+                        failed += 1
+                    else:
+                        email.attempts += 1
+                        email.date_sent = timezone.now()
+                        sent += 1
+            finally:
+                connection.close()
+        QueuedEmail.objects.bulk_update(emails, ['attempts', 'last_error', 'date_available', 'date_sent'])
+    return sent, failed
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+class KanbanColumnPaginator(Paginator):
+    "A Paginator whose count is known in advance, from `kanban_column_counts`"
+    def __init__(self, object_list, per_page, count):
+        super().__init__(object_list, per_page)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+def kanban_page_param(column):
+    "The query parameter holding a column's page number"
+    return column.name.lower() + '_page'
+
+def paginate_kanban_columns(queryset, columns, request, ordering=('-pk',), per_page=None):
+    """Fetches and paginates each kanban column separately, so that large 
+    columns (e.g. decided manuscripts) are never loaded in full. `queryset` must 
+    use KanbanQuerySetMixin. Returns a dict mapping each column name to a Page; 
+    each page's paginator knows how many rows are in the column.
+    """
+    per_page = per_page or settings.KANBAN_COLUMN_PAGE_SIZE
+    counts = queryset.kanban_column_counts()
+    pages = {}
+    for column in columns:
+        paginator = KanbanColumnPaginator(
+            queryset.in_kanban_column(column).order_by(*ordering), 
+            per_page, 
+            counts.get(column.name, 0),
+        )
+        pages[column.name] = paginator.get_page(request.GET.get(kanban_page_param(column)))
+        pages[column.name].param = kanban_page_param(column)
+    return pages
@@ -0,0 +1,59 @@
+import os
+import threading
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from queue import Queue, Full
+
+class QueuedFileHandler(QueueHandler):
+    """Puts log records on a bounded queue, from which a background thread
+    formats them and writes them to a WatchedFileHandler. Logging in a
+    request then costs a queue put rather than a JSON encode and a disk write.
+    When the queue is full, records are dropped rather than blocking, and
+    counted in `dropped`.
+
+    The listener thread is started by the first record each process logs, so
+    each gunicorn worker gets its own even if the app is loaded before forking.
+    Queued records are written when logging shuts down at exit.
+
+    Every worker appends to the same file, so none of them rotates it: that
+    is left to logrotate, and each worker reopens the file once it has been
+    moved away.
+    """
+    def __init__(self, filename, queueSize=10000):
+        super().__init__(Queue(queueSize))
+        self.target = WatchedFileHandler(filename, delay=True)
+        self.listener = None
+        self.listener_pid = None
+        self.listener_lock = threading.Lock()
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        "Formatting is done by the target handler, in the listener thread"
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        self.start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def start_listener(self):
+        if self.listener_pid == os.getpid():
+            return
+        with self.listener_lock:
+            if self.listener_pid != os.getpid():
+                self.queue = Queue(self.queue.maxsize)
+                self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                self.listener.start()
+                self.listener_pid = os.getpid()
+
+    def close(self):
+        if self.listener and self.listener_pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+            self.listener_pid = None
+        self.target.close()
+        super().close()
@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+def open_log(path):
+    "Opens a log file for reading text, decompressing it if it ends in .gz"
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def read_log_records(paths):
+    """Yields each JSON record in the log files, one line at a time, skipping
+    lines which are not JSON objects. Files are read in the order given.
+    """
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+def record_time(record):
+    "Returns the record's time as an aware datetime. JSONFormatter writes UTC."
+    return datetime.fromisoformat(record['time']).replace(tzinfo=dt_timezone.utc)
+
+def rotated_paths(path):
+    """Returns the existing files logged to `path`, oldest first, so that their
+    records are read in order. logrotate moves the log to `path.1`, and with
+    `compress` gzips older files to `path.2.gz` and so on.
+    """
+    rotated = []
+    n = 1
+    while True:
+        for name in ["{}.{}".format(path, n), "{}.{}.gz".format(path, n)]:
+            if os.path.exists(name):
+                rotated.append(name)
+                break
+        else:
+            break
+        n += 1
+    if os.path.exists(path):
+        rotated.insert(0, path)
+    return list(reversed(rotated))
+
+def filter_records(records, event=None, model=None, state=None, since=None, until=None):
+    """Yields records matching every filter given. `state` matches either the
+    old or the new state; `since` and `until` are inclusive dates.
+    """
+    for record in records:
+        if event and record.get('event') != event:
+            continue
+        if model and record.get('model') != model:
+            continue
+        if state and state not in (record.get('old_state'), record.get('new_state')):
+            continue
+        if since or until:
+            date = record_time(record).date()
+            if (since and date < since) or (until and date > until):
+                continue
+        yield record
+
+def transitions_per_day(records):
+    "Counts state transitions by (date, model, new state)"
+    counts = Counter()
+    for record in records:
+        if record.get('event') == 'state_transition':
+            counts[(record_time(record).date(), record['model'], record['new_state'])] += 1
+    return counts
+
+def emails_per_recipient(records):
+    "Counts emails logged for each recipient"
+    counts = Counter()
+    for record in records:
+        for recipient in record.get('recipients') or []:
+            counts[recipient] += 1
+    return counts
+
+def dwell_times(records):
+    """Measures how long objects stayed in each state, from each transition 
+    into a state to the object's next transition out of it. Only the latest 
+    transition of each object is held in memory. Returns a dict mapping 
+    (model, state) to (count, mean seconds, max seconds).
+    """
+    entered = {}
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for record in records:
+        if record.get('event') != 'state_transition':
+            continue
+        key = (record['model'], record['id'])
+        time = record_time(record)
+        if key in entered:
+            state, since = entered[key]
+            if state == record['old_state']:
+                seconds = (time - since).total_seconds()
+                total = totals[(record['model'], state)]
+                total[0] += 1
+                total[1] += seconds
+                total[2] = max(total[2], seconds)
+        entered[key] = (record['new_state'], time)
+    return {key: (n, total / n, longest) for key, (n, total, longest) in totals.items()}
@@ -0,0 +1,27 @@
+from time import sleep, perf_counter
+from django.core.management.base import BaseCommand
+from common.outbox import drain_outbox
+
+class Command(BaseCommand):
+    help = (
+        "Runs the side effects of state transitions, such as email and reviewer "
+        "assignment, which have been queued in the outbox. Run it from cron, or "
+        "keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-l', '--limit', type=int, help="Run at most this many messages")
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                help="Keep draining, waiting this long whenever the outbox is empty")
+
+    def handle(self, *args, **options):
+        while True:
+            start = perf_counter()
+            completed, failed = drain_outbox(options['limit'])
+            if completed or failed or not options['loop']:
+                self.stdout.write("Ran {} outbox messages ({} failed) in {:.3f}s".format(
+                        completed + failed, failed, perf_counter() - start))
+            if not options['loop']:
+                return
+            if not (completed or failed):
+                sleep(options['loop'])
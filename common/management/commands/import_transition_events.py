@@ -0,0 +1,51 @@
+from itertools import islice
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+from common.models import TransitionEvent
+from common.logfiles import read_log_records, record_time
+
+class Command(BaseCommand):
+    help = (
+        "Backfills TransitionEvents from analytics log files, which may be gzipped. "
+        "By default, only transitions logged before the earliest existing event are "
+        "imported, so the command can be rerun without duplicating events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['analytics.log'])
+        parser.add_argument('--before', type=parse_datetime,
+                help="Only import transitions logged before this ISO timestamp")
+        parser.add_argument('-b', '--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = options['before']
+        if before is None:
+            first = TransitionEvent.objects.order_by('timestamp').first()
+            before = first.timestamp if first else None
+        self.user_ids = dict(User.objects.values_list('username', 'id'))
+        events = self.events(read_log_records(options['paths']), before)
+        imported = 0
+        while True:
+            batch = list(islice(events, options['batch_size']))
+            if not batch:
+                break
+            TransitionEvent.objects.bulk_create(batch)
+            imported += len(batch)
+        self.stdout.write("Imported {} transition events.".format(imported))
+
+    def events(self, records, before):
+        for record in records:
+            if record.get('event') != 'state_transition':
+                continue
+            timestamp = record_time(record)
+            if before and timestamp >= before:
+                continue
+            yield TransitionEvent(
+                model=record['model'],
+                object_id=record['id'],
+                old_state=record['old_state'],
+                new_state=record['new_state'],
+                user_id=self.user_ids.get(record.get('user')),
+                timestamp=timestamp,
+            )
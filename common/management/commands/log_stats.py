@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from common.logfiles import (
+    read_log_records, 
+    rotated_paths, 
+    filter_records, 
+    transitions_per_day, 
+    emails_per_recipient, 
+    dwell_times,
+)
+
+DEFAULT_LOGS = {
+    'transitions': 'analytics.log',
+    'dwell': 'analytics.log',
+    'recipients': 'email.log',
+}
+
+class Command(BaseCommand):
+    help = (
+        "Summarizes JSON-lines log files, reading them one line at a time. "
+        "Rotated .gz files are read transparently. Without paths, reads analytics.log "
+        "(or email.log for the recipients report) and its rotated files, oldest first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=['transitions', 'dwell', 'recipients'],
+                help="transitions per day, dwell time in each state, or emails per recipient")
+        parser.add_argument('paths', nargs='*')
+        parser.add_argument('-e', '--event', help="Only records with this event")
+        parser.add_argument('-m', '--model', help="Only transitions of this model")
+        parser.add_argument('--state', help="Only transitions into or out of this state")
+        parser.add_argument('--since', type=parse_date, help="Only records on or after this date")
+        parser.add_argument('--until', type=parse_date, help="Only records on or before this date")
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or rotated_paths(DEFAULT_LOGS[options['report']])
+        records = filter_records(read_log_records(paths), 
+            event=options['event'],
+            model=options['model'],
+            state=options['state'],
+            since=options['since'],
+            until=options['until'],
+        )
+        getattr(self, 'write_' + options['report'])(records)
+
+    def write_transitions(self, records):
+        self.stdout.write("{:<12} {:<10} {:<16} {:>8}".format("date", "model", "new state", "count"))
+        for (date, model, state), count in sorted(transitions_per_day(records).items()):
+            self.stdout.write("{:<12} {:<10} {:<16} {:>8}".format(str(date), model, state, count))
+
+    def write_dwell(self, records):
+        self.stdout.write("{:<10} {:<16} {:>8} {:>12} {:>12}".format(
+                "model", "state", "count", "mean (h)", "max (h)"))
+        for (model, state), (count, mean, longest) in sorted(dwell_times(records).items()):
+            self.stdout.write("{:<10} {:<16} {:>8} {:>12.1f} {:>12.1f}".format(
+                    model, state, count, mean / 3600, longest / 3600))
+
+    def write_recipients(self, records):
+        self.stdout.write("{:<40} {:>8}".format("recipient", "emails"))
+        for recipient, count in emails_per_recipient(records).most_common():
+            self.stdout.write("{:<40} {:>8}".format(recipient, count))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from common.notifications import send_digests
+
+class Command(BaseCommand):
+    help = (
+        "Emails each user a digest of their pending notifications once the oldest is "
+        "NOTIFICATION_DIGEST_MINUTES old. Run it from cron every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flush', action='store_true', 
+                help="Send all pending notifications now, however recent")
+
+    def handle(self, *args, **options):
+        digests, notifications = send_digests(flush=options['flush'])
+        self.stdout.write("Sent {} notifications in {} digests.".format(notifications, digests))
@@ -0,0 +1,29 @@
+from time import sleep, perf_counter
+from django.core.management.base import BaseCommand
+from common.email import send_queued_email_batch
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued journal email in batches, each over one connection, within "
+        "JOURNAL_EMAIL_RATE_LIMIT. Run it from cron, or keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                help="Keep sending, waiting this long whenever there is nothing to send")
+
+    def handle(self, *args, **options):
+        while True:
+            start = perf_counter()
+            sent, failed = 0, 0
+            while True:
+                batch_sent, batch_failed = send_queued_email_batch()
+                if not (batch_sent or batch_failed):
+                    break
+                sent, failed = sent + batch_sent, failed + batch_failed
+            if sent or failed or not options['loop']:
+                self.stdout.write("Sent {} emails ({} failed) in {:.3f}s".format(
+                        sent, failed, perf_counter() - start))
+            if not options['loop']:
+                return
+            sleep(options['loop'])
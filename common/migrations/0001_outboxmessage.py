@@ -0,0 +1,32 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200)),
+                ('payload', models.JSONField(default=dict)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_available', models.DateTimeField(default=django.utils.timezone.now)),
+                ('date_completed', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['date_completed', 'date_available'], name='outbox_pending_idx'),
+        ),
+    ]
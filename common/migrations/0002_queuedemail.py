@@ -0,0 +1,33 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=500)),
+                ('body', models.TextField()),
+                ('sender', models.CharField(max_length=200)),
+                ('recipients', models.JSONField(default=list)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_available', models.DateTimeField(default=django.utils.timezone.now)),
+                ('date_sent', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='queuedemail',
+            index=models.Index(fields=['date_sent', 'date_available'], name='queued_email_pending_idx'),
+        ),
+    ]
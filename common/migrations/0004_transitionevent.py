@@ -0,0 +1,37 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('common', '0003_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('old_state', models.CharField(max_length=20)),
+                ('new_state', models.CharField(max_length=20)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transitionevent',
+            index=models.Index(fields=['model', 'object_id'], name='transition_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transitionevent',
+            index=models.Index(fields=['new_state', 'timestamp'], name='transition_state_time_idx'),
+        ),
+    ]
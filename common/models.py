@@ -1,7 +1,126 @@
 from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db.models import Case, When, Value, Count
 
 class NondeletedManager(models.Manager):
     "A model manager which excludes deleted objects"
     def get_queryset(self):
         return super().get_queryset().filter(deleted=False)
 
+class KanbanQuerySetMixin:
+    """A QuerySet mixin which classifies rows into kanban columns in SQL.
+    Subclasses set `kanban_status_field` to the (possibly related) status field
+    and override `get_kanban_assignment` to return a dict mapping statuses to 
+    kanban columns, such as `Revision.KANBAN_ASSIGNMENT`.
+    """
+    kanban_status_field = 'status'
+
+    def get_kanban_assignment(self):
+        return {}
+
+    def kanban_column_statuses(self, column):
+        "Returns the statuses which belong in a kanban column"
+        return [status for status, col in self.get_kanban_assignment().items() if col == column]
+
+    def with_kanban_column(self):
+        "Annotates each row with `kanban_column_name`, computed with a Case expression"
+        columns = {}
+        for status, column in self.get_kanban_assignment().items():
+            columns.setdefault(column, []).append(status)
+        whens = [When(**{self.kanban_status_field + '__in': statuses}, then=Value(column.name))
+                for column, statuses in columns.items()]
+        return self.annotate(kanban_column_name=Case(*whens, output_field=models.CharField()))
+
+    def in_kanban_column(self, column):
+        "Filters to rows in a kanban column"
+        return self.filter(**{self.kanban_status_field + '__in': self.kanban_column_statuses(column)})
+
+    def kanban_column_counts(self):
+        "Returns a dict mapping kanban column names to row counts, using one query"
+        rows = (self.with_kanban_column().order_by().values('kanban_column_name')
+                .annotate(count=Count('pk', distinct=True)))
+        return {row['kanban_column_name']: row['count'] for row in rows}
+
+class OutboxMessage(models.Model):
+    """A side effect of a state transition, such as sending email, which is
+    written in the same transaction as the transition and run afterwards by the
+    `drain_outbox` command. See common.outbox.
+    """
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_available = models.DateTimeField(default=timezone.now)
+    date_completed = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_completed', 'date_available'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return "{} {} ({} attempts)".format(self.task, self.payload, self.attempts)
+
+class QueuedEmail(models.Model):
+    """An email waiting to be sent by the `send_queued_email` command. 
+    See common.email.
+    """
+    subject = models.CharField(max_length=500)
+    body = models.TextField()
+    sender = models.CharField(max_length=200)
+    recipients = models.JSONField(default=list)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_available = models.DateTimeField(default=timezone.now)
+    date_sent = models.DateTimeField(blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_sent', 'date_available'], name='queued_email_pending_idx'),
+        ]
+
+    def __str__(self):
+        return "Email to {}: {}".format(', '.join(self.recipients), self.subject)
+
+class Notification(models.Model):
+    """A notification waiting to be sent to a user as part of a digest by the
+    `send_digests` command. See common.notifications.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    subject = models.CharField(max_length=500)
+    body = models.TextField()
+    date_created = models.DateTimeField(default=timezone.now)
+    date_sent = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_sent', 'user'], name='notification_pending_idx'),
+        ]
+
+    def __str__(self):
+        return "Notification for {}: {}".format(self.user.username, self.subject)
+
+class TransitionEvent(models.Model):
+    """A record of one object's state transition, written by the state 
+    machines alongside the analytics log.
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    old_state = models.CharField(max_length=20)
+    new_state = models.CharField(max_length=20)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, 
+            related_name='+')
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'object_id'], name='transition_object_idx'),
+            models.Index(fields=['new_state', 'timestamp'], name='transition_state_time_idx'),
+        ]
+
+    def __str__(self):
+        return "{} {} transitioned from {} to {}".format(self.model, self.object_id, 
+                self.old_state, self.new_state)
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .email import send_journal_email
+from .models import Notification
+
+DIGEST_SUBJECT = "Your notifications from the {}"
+
+DIGEST_SEPARATOR = "\n\n" + "-" * 40 + "\n\n"
+
+def notify(user, subject, body):
+    """Notifies a user by email. Unless digests are turned off with
+    NOTIFICATION_DIGEST_MINUTES = None, or the user has chosen immediate
+    notifications, the notification is saved to be sent in the user's next
+    digest. Users without an email address are not notified.
+    """
+    if not user.email:
+        return
+    if settings.NOTIFICATION_DIGEST_MINUTES is None or user.profile.immediate_notifications:
+        send_journal_email(subject, body, [user.email])
+    else:
+        Notification.objects.create(user=user, subject=subject, body=body)
+
+def send_digests(now=None, flush=False):
+    """Sends one email to each user whose oldest pending notification is at
+    least NOTIFICATION_DIGEST_MINUTES old, containing all their pending
+    notifications. With `flush`, sends every pending notification regardless
+    of age. Returns the numbers of digests sent and notifications included.
+    """
+    now = now or timezone.now()
+    pending = Notification.objects.filter(date_sent__isnull=True)
+    due_users = pending.values('user').annotate(oldest=Min('date_created'))
+    if not flush:
+        window = timedelta(minutes=settings.NOTIFICATION_DIGEST_MINUTES or 0)
+        due_users = due_users.filter(oldest__lte=now - window)
+    with transaction.atomic():
+        notifications = list(pending.filter(user__in=due_users.values('user'))
+                .select_for_update(skip_locked=True)
+                .select_related('user').order_by('user', 'date_created'))
+        by_user = defaultdict(list)
+        for notification in notifications:
+            by_user[notification.user].append(notification)
+        for user, user_notifications in by_user.items():
+            send_digest(user, user_notifications)
+        Notification.objects.filter(pk__in=[n.pk for n in notifications]).update(date_sent=now)
+    return len(by_user), len(notifications)
+
+def send_digest(user, notifications):
+    "Sends a single notification as it is; several as one digest email"
+    if len(notifications) == 1:
+        send_journal_email(notifications[0].subject, notifications[0].body, [user.email])
+    else:
+        body = DIGEST_SEPARATOR.join("{}\n\n{}".format(n.subject, n.body) for n in notifications)
+        send_journal_email(DIGEST_SUBJECT.format(settings.JOURNAL_NAME), body, [user.email])
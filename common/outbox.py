@@ -0,0 +1,70 @@
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+def enqueue(task, **payload):
+    """Records that `task` should be called with `payload` as keyword arguments.
+    Call this in the same transaction as the state change which causes it, so 
+    the task runs if and only if the change commits. Tasks must be module-level
+    functions, and payloads must be JSON-serializable; pass ids, not objects.
+    Tasks may run more than once if a worker fails partway through.
+    """
+    return OutboxMessage.objects.create(
+        task="{}.{}".format(task.__module__, task.__qualname__),
+        payload=payload,
+    )
+
+def pending_messages(now=None):
+    "Messages which are not complete, are due to be tried, and have attempts left"
+    return OutboxMessage.objects.filter(
+        date_completed__isnull=True,
+        date_available__lte=now or timezone.now(),
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )
+
+def run_next_message():
+    """Claims the oldest pending message and runs its task. Messages locked by
+    another worker are skipped. A task which raises is retried after 
+    OUTBOX_RETRY_DELAY seconds, doubling with each attempt, until it has been 
+    tried OUTBOX_MAX_ATTEMPTS times. Returns the message, or None if there was
+    nothing to do.
+    """
+    with transaction.atomic():
+        message = pending_messages().select_for_update(skip_locked=True).order_by('pk').first()
+        if message is None:
+            return None
+        message.attempts += 1
+        try:
+            with transaction.atomic():
+                import_string(message.task)(**message.payload)
+        except Exception:
+            logger.exception("Outbox task {} failed".format(message))
+            message.last_error = traceback.format_exc()
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1)
+            message.date_available = timezone.now() + timedelta(seconds=delay)
+        else:
+            message.date_completed = timezone.now()
+        message.save()
+        return message
+
+def drain_outbox(limit=None):
+    """Runs pending messages until none are left, or until `limit` have run.
+    Returns a tuple of the numbers of messages completed and failed.
+    """
+    completed, failed = 0, 0
+    while limit is None or completed + failed < limit:
+        message = run_next_message()
+        if message is None:
+            break
+        if message.date_completed:
+            completed += 1
+        else:
+            failed += 1
+    return completed, failed
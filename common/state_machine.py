@@ -1,3 +1,12 @@
+import logging
+from collections import defaultdict
+from functools import partial
+from django.db import transaction
+from django.utils import timezone
+from .models import TransitionEvent
+
+logger = logging.getLogger("cognitive_apprenticeship.analytics")
+
 class StateMachine:
     """A StateMachine handles state transitions.
     Several objects in `cognitive apprenticeship` progress through states. 
@@ -10,6 +19,9 @@ class StateMachine:
 
     states = []
     transitions = {}
+    bulk_transitions = {}
+    state_field = None
+    model_name = None
 
     def __init__(self, request=None):
         """Optionally initialized with a request.
@@ -20,6 +32,8 @@ class StateMachine:
         """Transitions the object from its current state to the new state, 
         checking that the transition is allowed and calling the side effects
         function (which should at a minimum persist the new state information).
+        The side effects run in a transaction, so a transition which fails 
+        leaves no TransitionEvent or log record behind.
         """
         if not self.transition_allowed(obj, new_state):
             raise self.IllegalTransition("Transition to {} not allowed".format(new_state))
@@ -29,7 +43,90 @@ class StateMachine:
         except (KeyError, TypeError):
             msg = "Invalid state transition from {} to {}".format(old_state, new_state)
             raise self.IllegalTransition(msg)
-        side_effects(self, obj, old_state, new_state)
+        with transaction.atomic():
+            side_effects(self, obj, old_state, new_state)
+
+    def transition_many(self, queryset, new_state):
+        """Transitions every object in the queryset to the new state at once.
+        Objects are grouped by their current state, and nothing is changed 
+        unless the transition is allowed from every group's state. Each group 
+        is then moved with a single UPDATE of the state field and the fields 
+        given by `transition_fields`, followed by `bulk_side_effects`. The 
+        per-object side effects functions in `transitions` are not called. 
+        Each group's TransitionEvents are written with one INSERT; log records 
+        are written together once the transaction commits.
+        Returns the transitioned objects, with their new field values.
+        """
+        with transaction.atomic():
+            objs = list(queryset.select_for_update().order_by('pk'))
+            groups = defaultdict(list)
+            for obj in objs:
+                groups[self.get_state(obj)].append(obj)
+            for old_state in groups:
+                if new_state not in self.transitions.get(old_state, {}):
+                    msg = "Invalid state transition from {} to {}".format(old_state, new_state)
+                    raise self.IllegalTransition(msg)
+            for old_state, group in groups.items():
+                fields = {self.state_field: new_state}
+                fields.update(self.transition_fields(old_state, new_state))
+                queryset.model._base_manager.filter(pk__in=[obj.pk for obj in group]).update(**fields)
+                for obj in group:
+                    for field, value in fields.items():
+                        setattr(obj, field, value)
+                self.bulk_side_effects(group, old_state, new_state)
+                self.record_transition_events(group, old_state, new_state)
+                transaction.on_commit(partial(self.log_state_transitions, group, old_state, new_state))
+        return objs
+
+    def transition_fields(self, old_state, new_state):
+        """Returns a dict of the fields, other than the state, which are set by
+        a transition, such as timestamps.
+        """
+        return {}
+
+    def set_state(self, obj, old_state, new_state):
+        "Sets the object's state and the other fields set by the transition"
+        setattr(obj, self.state_field, new_state)
+        for field, value in self.transition_fields(old_state, new_state).items():
+            setattr(obj, field, value)
+
+    def bulk_side_effects(self, objs, old_state, new_state):
+        """Runs after a group of objects has been moved from one state to 
+        another by `transition_many`, within its transaction. Transitions opt in
+        to side effects by having a function in `bulk_transitions`, which is 
+        called with the whole group.
+        """
+        side_effects = self.bulk_transitions.get(old_state, {}).get(new_state)
+        if side_effects:
+            side_effects(self, objs, old_state, new_state)
+
+    def log_state_transition(self, obj, old_state, new_state):
+        """Records a transition as a TransitionEvent, in the transition's 
+        transaction, and in the analytics log once the transaction commits.
+        """
+        self.record_transition_events([obj], old_state, new_state)
+        transaction.on_commit(partial(self.log_state_transitions, [obj], old_state, new_state))
+
+    def log_state_transitions(self, objs, old_state, new_state):
+        for obj in objs:
+            msg = "{} {} transitioned from {} to {}".format(self.model_name, obj.id, old_state, new_state)
+            logger.info(msg, extra={
+                'event': 'state_transition',
+                'old_state': old_state,
+                'new_state': new_state,
+                'model': self.model_name,
+                'user': self.request.user.username if self.request else None,
+                'id': obj.id,
+            })
+
+    def record_transition_events(self, objs, old_state, new_state):
+        user = self.request.user if self.request and self.request.user.is_authenticated else None
+        now = timezone.now()
+        TransitionEvent.objects.bulk_create([
+            TransitionEvent(model=self.model_name, object_id=obj.id, old_state=old_state, 
+                    new_state=new_state, user=user, timestamp=now)
+            for obj in objs
+        ])
 
     def allowed_transitions(self, obj):
         """Returns a list of available transitions.
@@ -0,0 +1,32 @@
+from contextlib import contextmanager
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+
+class HashedStaticFilesStorage(ManifestStaticFilesStorage):
+    """Names collected static files by their content hash, so that they can be
+    served with far-future expiry. Until collectstatic has collected a file,
+    its unhashed name is used rather than raising an error, so pages still
+    render in development and tests.
+    """
+    manifest_strict = False
+    force_hashed_urls = False
+
+    def url(self, name, force=False):
+        return super().url(name, force=force or self.force_hashed_urls)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+@contextmanager
+def hashed_static_urls():
+    """Links to hashed static files even when DEBUG is on, as the static
+    export must. Has no effect with other storages.
+    """
+    previous = getattr(staticfiles_storage, 'force_hashed_urls', False)
+    staticfiles_storage.force_hashed_urls = True
+    try:
+        yield
+    finally:
+        staticfiles_storage.force_hashed_urls = previous
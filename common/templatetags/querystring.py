@@ -0,0 +1,10 @@
+from django import template
+
+register = template.Library()
+
+@register.simple_tag(takes_context=True)
+def query_with(context, name, value):
+    "Returns the current query string, with one parameter replaced"
+    params = context['request'].GET.copy()
+    params[name] = value
+    return params.urlencode()
@@ -1,3 +1,262 @@
-from django.test import TestCase
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+from unittest import mock
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends import locmem
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from author.models import Revision
+from author.state_machine import RevisionStateMachine
+from reviewer.models import Review
+from editor.tests import make_user, make_manuscript
+from .models import OutboxMessage, QueuedEmail, Notification, TransitionEvent
+from .notifications import notify, send_digests
+from .log_handlers import QueuedFileHandler
+from .logfiles import rotated_paths, read_log_records
+from .email import send_journal_email, send_queued_email_batch, pending_emails
+from .outbox import enqueue, drain_outbox, pending_messages
 
-# Create your tests here.
+def failing_task(**kwargs):
+    raise ValueError("Task failed")
+
+@override_settings(NUMBER_OF_REVIEWERS=2, AUTOMATICALLY_ASSIGN_REVIEWERS=True)
+class OutboxTest(TestCase):
+    def test_submission_side_effects_run_from_outbox(self):
+        author = make_user("author", is_author=True)
+        reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(3)]
+        m = make_manuscript([author], Revision.StatusChoices.UNSUBMITTED)
+        RevisionStateMachine().transition(m.current_revision, Revision.StatusChoices.PENDING)
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(pending_messages().count(), 2)
+        self.assertEqual(drain_outbox(), (4, 0))
+        self.assertEqual(Review.objects.count(), 2)
+        self.assertEqual(drain_outbox(), (0, 0))
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_DELAY=0)
+    def test_failed_tasks_are_retried(self):
+        message = enqueue(failing_task, revision_id=1)
+        with self.assertLogs('common.outbox', 'ERROR'):
+            self.assertEqual(drain_outbox(limit=1), (0, 1))
+            self.assertEqual(drain_outbox(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 2)
+        self.assertIn("Task failed", message.last_error)
+        self.assertIsNone(message.date_completed)
+        self.assertFalse(pending_messages().exists())
+
+class CountingEmailBackend(locmem.EmailBackend):
+    "Records how many connections are opened"
+    connections_opened = 0
+
+    def open(self):
+        CountingEmailBackend.connections_opened += 1
+        return True
+
+@override_settings(
+    SEND_JOURNAL_EMAIL=True, 
+    EMAIL_BACKEND='common.tests.CountingEmailBackend',
+    JOURNAL_EMAIL_RATE_LIMIT=5,
+)
+class QueuedEmailTest(TestCase):
+    def setUp(self):
+        CountingEmailBackend.connections_opened = 0
+
+    def test_batches_share_a_connection(self):
+        for i in range(3):
+            send_journal_email("Subject {}".format(i), "Body", ["user{}@example.com".format(i)])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(send_queued_email_batch(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.connections_opened, 1)
+        self.assertEqual(send_queued_email_batch(), (0, 0))
+
+    def test_rate_limit(self):
+        for i in range(7):
+            send_journal_email("Subject", "Body", ["user@example.com"])
+        self.assertEqual(send_queued_email_batch(), (5, 0))
+        self.assertEqual(send_queued_email_batch(), (0, 0))
+        self.assertEqual(pending_emails().count(), 2)
+
+    @override_settings(JOURNAL_EMAIL_RETRY_DELAY=0)
+    def test_failed_email_is_retried(self):
+        send_journal_email("Subject", "Body", ["user@example.com"])
+        with mock.patch.object(CountingEmailBackend, 'send_messages', side_effect=OSError("refused")):
+            with self.assertLogs('cognitive_apprenticeship.email', 'ERROR'):
+                self.assertEqual(send_queued_email_batch(), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("refused", email.last_error)
+        self.assertEqual(send_queued_email_batch(), (1, 0))
+
+    @override_settings(JOURNAL_EMAIL_RETRY_DELAY=60)
+    def test_connection_failure_is_retried(self):
+        for i in range(2):
+            send_journal_email("Subject", "Body", ["user@example.com"])
+        with mock.patch.object(CountingEmailBackend, 'open', side_effect=OSError("refused")):
+            with self.assertLogs('cognitive_apprenticeship.email', 'ERROR'):
+                self.assertEqual(send_queued_email_batch(), (0, 2))
+        for email in QueuedEmail.objects.all():
+            self.assertEqual(email.attempts, 1)
+            self.assertIn("refused", email.last_error)
+            self.assertGreater(email.date_available, timezone.now())
+        self.assertEqual(send_queued_email_batch(), (0, 0))
+
+@override_settings(SEND_JOURNAL_EMAIL=True, NOTIFICATION_DIGEST_MINUTES=60)
+class NotificationDigestTest(TestCase):
+    def setUp(self):
+        self.user = make_user("user")
+        self.user.email = "user@example.com"
+        self.user.save()
+
+    def test_notifications_are_coalesced(self):
+        for i in range(3):
+            notify(self.user, "Subject {}".format(i), "Body {}".format(i))
+        self.assertFalse(QueuedEmail.objects.exists())
+        self.assertEqual(send_digests(), (0, 0))
+        later = timezone.now() + timedelta(minutes=61)
+        self.assertEqual(send_digests(now=later), (1, 3))
+        email = QueuedEmail.objects.get()
+        self.assertIn("Subject 2", email.body)
+        self.assertEqual(send_digests(now=later), (0, 0))
+
+    def test_immediate_notifications(self):
+        self.user.profile.immediate_notifications = True
+        self.user.profile.save()
+        notify(self.user, "Subject", "Body")
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+class QueuedFileHandlerTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'test.log')
+
+    def make_logger(self, name='common.tests.queued', **kwargs):
+        handler = QueuedFileHandler(self.path, **kwargs)
+        handler.setFormatter(logging.Formatter('{"n": %(message)s}'))
+        log = logging.getLogger(name)
+        log.propagate = False
+        log.addHandler(handler)
+        self.addCleanup(log.removeHandler, handler)
+        return log, handler
+
+    def test_no_records_are_lost_when_workers_share_a_rotated_file(self):
+        loggers = [self.make_logger('common.tests.queued{}'.format(i)) for i in range(2)]
+        for i in range(40):
+            loggers[i % 2][0].warning(i)
+            if i == 19:
+                for log, handler in loggers:
+                    handler.listener.stop()
+                os.rename(self.path, self.path + '.1')
+                for log, handler in loggers:
+                    handler.listener.start()
+        for log, handler in loggers:
+            handler.close()
+        records = list(read_log_records(rotated_paths(self.path)))
+        self.assertEqual(sorted(r['n'] for r in records), list(range(40)))
+        self.assertEqual(rotated_paths(self.path), [self.path + '.1', self.path])
+
+    def test_full_queue_drops_records(self):
+        log, handler = self.make_logger(queueSize=1)
+        handler.start_listener()
+        handler.listener.stop()
+        log.warning("Kept")
+        log.warning("Dropped")
+        self.assertEqual(handler.dropped, 1)
+        handler.listener = None
+        handler.close()
+
+class TransitionEventTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_transitions_are_recorded(self):
+        author = make_user("author", is_author=True)
+        m = make_manuscript([author], Revision.StatusChoices.UNSUBMITTED)
+        RevisionStateMachine().transition(m.current_revision, Revision.StatusChoices.PENDING)
+        event = TransitionEvent.objects.get()
+        self.assertEqual(event.model, 'Revision')
+        self.assertEqual(event.object_id, m.current_revision.id)
+        self.assertEqual((event.old_state, event.new_state), ('UNSUBMITTED', 'PENDING'))
+
+    def test_failed_transition_is_not_recorded(self):
+        author = make_user("author", is_author=True)
+        m = make_manuscript([author], Revision.StatusChoices.PENDING)
+        with mock.patch.object(Revision, 'save', side_effect=ValueError("save failed")):
+            with self.assertRaises(ValueError):
+                with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                    RevisionStateMachine().transition(m.current_revision, Revision.StatusChoices.WITHDRAWN)
+        self.assertFalse(TransitionEvent.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_import_from_gzipped_log(self):
+        author = make_user("author", is_author=True)
+        path = os.path.join(self.dir, 'analytics.log.1.gz')
+        records = [
+            {"time": "2021-01-01T12:00:00", "event": "state_transition", "model": "Review",
+                "id": 3, "old_state": "ASSIGNED", "new_state": "ACCEPTED", "user": "author"},
+            {"time": "2021-01-02T12:00:00", "event": "other"},
+        ]
+        with gzip.open(path, 'wt') as f:
+            f.write("\n".join(json.dumps(r) for r in records) + "\nnot json\n")
+        call_command('import_transition_events', path, stdout=StringIO())
+        event = TransitionEvent.objects.get()
+        self.assertEqual(event.user, author)
+        self.assertEqual(event.timestamp.isoformat(), "2021-01-01T12:00:00+00:00")
+        call_command('import_transition_events', path, stdout=StringIO())
+        self.assertEqual(TransitionEvent.objects.count(), 1)
+
+class LogStatsTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, 'analytics.log')
+        transitions = [
+            ("2021-01-01T09:00:00", 1, "ASSIGNED", "ACCEPTED"),
+            ("2021-01-01T10:00:00", 2, "ASSIGNED", "ACCEPTED"),
+            ("2021-01-02T09:00:00", 1, "ACCEPTED", "SUBMITTED"),
+            ("2021-01-03T10:00:00", 2, "ACCEPTED", "SUBMITTED"),
+        ]
+        records = [{"time": t, "event": "state_transition", "model": "Review", "id": i, 
+                "old_state": old, "new_state": new} for t, i, old, new in transitions]
+        with gzip.open(self.path + '.1.gz', 'wt') as f:
+            f.writelines(json.dumps(r) + "\n" for r in records[:2])
+        with open(self.path, 'w') as f:
+            f.writelines(json.dumps(r) + "\n" for r in records[2:])
+
+    def log_stats(self, *args):
+        out = StringIO()
+        call_command('log_stats', *args, stdout=out)
+        return out.getvalue().splitlines()[1:]
+
+    def test_transitions_per_day(self):
+        rows = self.log_stats('transitions', *rotated_paths(self.path))
+        self.assertEqual([row.split() for row in rows], [
+            ["2021-01-01", "Review", "ACCEPTED", "2"],
+            ["2021-01-02", "Review", "SUBMITTED", "1"],
+            ["2021-01-03", "Review", "SUBMITTED", "1"],
+        ])
+        rows = self.log_stats('transitions', *rotated_paths(self.path), 
+                '--since', '2021-01-02', '--state', 'SUBMITTED')
+        self.assertEqual(len(rows), 2)
+
+    def test_dwell_times(self):
+        rows = self.log_stats('dwell', *rotated_paths(self.path))
+        self.assertEqual([row.split() for row in rows], [["Review", "ACCEPTED", "2", "36.0", "48.0"]])
+
+    def test_emails_per_recipient(self):
+        path = os.path.join(self.dir, 'email.log')
+        with open(path, 'w') as f:
+            for recipients in [["a@example.com"], ["a@example.com", "b@example.com"]]:
+                f.write(json.dumps({"time": "2021-01-01T09:00:00", "recipients": recipients}) + "\n")
+        rows = self.log_stats('recipients', path)
+        self.assertEqual([row.split() for row in rows], [["a@example.com", "2"], ["b@example.com", "1"]])
@@ -0,0 +1,56 @@
+from collections import namedtuple
+from django.db.models import Prefetch
+from author.models import Manuscript, Revision
+from reviewer.models import Review
+from common.kanban import paginate_kanban_columns
+
+ManuscriptRow = namedtuple('ManuscriptRow', [
+    'id',
+    'title',
+    'author_names',
+    'status',
+    'status_message',
+    'reviews',
+])
+ReviewRow = namedtuple('ReviewRow', ['reviewer_name', 'status'])
+
+def board_queryset(manuscripts):
+    """Attaches everything a manuscript cell needs to the queryset: the current
+    revision, its reviews and their reviewers, and the authors. Loading a page 
+    of manuscripts costs three queries regardless of its size.
+    """
+    return manuscripts.select_related('current_revision').prefetch_related(
+        Prefetch(
+            'current_revision__reviews',
+            queryset=Review.objects.select_related('reviewer').order_by('pk'),
+        ),
+        Prefetch('authors'),
+    )
+
+def manuscript_row(manuscript):
+    "Flattens a manuscript loaded with `board_queryset` into a template row"
+    revision = manuscript.current_revision
+    reviews = [
+        ReviewRow(
+            "{} {}".format(review.reviewer.first_name, review.reviewer.last_name),
+            review.status,
+        )
+        for review in revision.reviews.all()
+    ]
+    return ManuscriptRow(
+        manuscript.id,
+        revision.title,
+        manuscript.author_names(),
+        revision.status,
+        revision.status_message(),
+        reviews,
+    )
+
+def manuscript_board(manuscripts, request):
+    """Fetches and paginates each kanban column separately.
+    Returns a dict mapping each column name to a Page of ManuscriptRows.
+    """
+    pages = paginate_kanban_columns(board_queryset(manuscripts), Revision.KanbanColumns, request)
+    for page in pages.values():
+        page.object_list = [manuscript_row(manuscript) for manuscript in page.object_list]
+    return pages
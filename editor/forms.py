@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.models import User
 from author.models import Manuscript, Revision
 from reviewer.models import Review
+from reviewer.interactions import exclude_conflicts
 from tinymce.widgets import TinyMCE
 from .models import JournalIssue
 
@@ -12,12 +13,10 @@ class AssignReviewerForm(forms.Form):
 
     def __init__(self, manuscript, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.possible_reviewers = (
-            User.objects
-            .filter(profile__is_reviewer=True)
-            .exclude(manuscripts=manuscript)
-            .exclude(reviewed_manuscripts=manuscript)
-        )
+        self.possible_reviewers = exclude_conflicts(
+            User.objects.filter(profile__is_reviewer=True), 
+            manuscript.authors.values('id'),
+        ).exclude(reviewed_manuscripts=manuscript)
         self.fields['reviewer'].queryset = self.possible_reviewers
 
     def num_possible_reviewers(self):
@@ -1,45 +1,75 @@
-from datetime import datetime, timedelta
-from django.utils import timezone
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from author.models import Manuscript
-from reviewer.models import Review
-from reviewer.assignment import ranked_reviewers
-from reviewer.email import notify_user_when_review_created
+from django.db import transaction
+from author.models import Manuscript, Revision
+from reviewer.assignment import batch_assign_reviewers, clear_reviewers
 
 class Command(BaseCommand):
-    help = 'Assign reviewers to a manuscript'
+    help = (
+        'Assigns reviewers to the current revisions of many manuscripts at once, '
+        'balancing reviewer load across the whole batch. Manuscripts which already '
+        'have reviewers are topped up to NUMBER_OF_REVIEWERS. Everything is saved in '
+        'one transaction, and reviewers are emailed once it commits.'
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument('manuscript_id', type=int)
+        parser.add_argument('manuscript_ids', type=int, nargs='*', metavar='manuscript_id')
+        parser.add_argument('--all-pending', action='store_true', 
+                help="Assign reviewers to every manuscript whose current revision is pending")
+        parser.add_argument('-s', '--status', choices=Revision.StatusChoices.values,
+                help="Only assign reviewers to manuscripts whose current revision has this status")
         parser.add_argument('--clear', action='store_true', help="Clear existing reviewers")
         parser.add_argument('-d', '--days', type=int, help="Days to review")
+        parser.add_argument('--dry-run', action='store_true', 
+                help="Print the proposed assignment without saving it")
 
     def handle(self, *args, **options):
-        try: 
-            m = Manuscript.objects.get(id=options['manuscript_id'])
-        except Manuscript.DoesNotExist:
-            raise CommandError("Manuscript not found")
-        if options['clear']:
-            Review.objects.filter(revision__manuscript=m).all().delete()
-            m.reviewers.clear()
-        else:
-            if m.reviewers.count() > 0:
-                msg = "Manuscript {} already has reviewers. Use --clear to remove them."
-                raise CommandError(msg.format(m.id))
-        reviewers = ranked_reviewers(m.authors.all())
-        if len(reviewers) >= settings.NUMBER_OF_REVIEWERS:
-            days_until_due = options.get('days') or settings.DAYS_TO_REVIEW
-            date_due = timezone.now() + timedelta(days=days_until_due)
-            for reviewer in reviewers[:settings.NUMBER_OF_REVIEWERS]:
-                m.reviewers.add(reviewer)
-                review = Review(
-                    revision=m.revisions.last(),
-                    reviewer=reviewer,
-                    date_due=date_due,
-                )
-                review.save()
-                notify_user_when_review_created(review)
+        manuscripts = self.get_manuscripts(options)
+        revisions = Revision.objects.filter(pk__in=manuscripts.values('current_revision'))
+        with transaction.atomic():
+            if options['clear']:
+                cleared = clear_reviewers(manuscripts)
+                self.stdout.write("Cleared {} reviews.".format(cleared))
+            plan = batch_assign_reviewers(revisions, days=options['days'], 
+                    dry_run=options['dry_run'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        self.write_plan(plan, options['dry_run'])
+
+    def get_manuscripts(self, options):
+        manuscripts = Manuscript.objects.all()
+        if options['manuscript_ids']:
+            manuscripts = manuscripts.filter(id__in=options['manuscript_ids'])
+            missing = set(options['manuscript_ids']) - set(manuscripts.values_list('id', flat=True))
+            if missing:
+                raise CommandError("Manuscripts not found: {}".format(
+                        ', '.join(str(i) for i in sorted(missing))))
+        elif not (options['all_pending'] or options['status']):
+            raise CommandError("Give manuscript ids, --all-pending, or --status")
+        if options['all_pending']:
+            manuscripts = manuscripts.filter(current_revision__status=Revision.StatusChoices.PENDING)
+        if options['status']:
+            manuscripts = manuscripts.filter(current_revision__status=options['status'])
+        return manuscripts
+
+    def write_plan(self, plan, dry_run):
+        "Prints a table of each revision's new reviewers"
+        if not plan:
+            self.stdout.write("No revisions need reviewers.")
+            return
+        self.stdout.write("{:>10} {:>8}  {:<40} {}".format("manuscript", "version", "title", "reviewers"))
+        for revision, reviewers in plan.items():
+            self.stdout.write("{:>10} {:>8}  {:<40} {}".format(
+                revision.manuscript_id,
+                revision.revision_number,
+                revision.title[:40],
+                ', '.join(r.username for r in reviewers) or "no eligible reviewers",
+            ))
+            needed = settings.NUMBER_OF_REVIEWERS - len(revision.manuscript.reviewers.all())
+            if len(reviewers) < needed:
+                self.stderr.write("Not enough reviewers for manuscript {}".format(revision.manuscript_id))
+        if dry_run:
+            self.stdout.write("Dry run; no reviewers were assigned.")
         else:
-            msg = "Not enough reviewers for manuscript {}".format(rev.manuscript_id)
-            raise CommandError(msg)
+            count = sum(len(reviewers) for reviewers in plan.values())
+            self.stdout.write("Assigned {} reviewers to {} revisions.".format(count, len(plan)))
@@ -0,0 +1,18 @@
+from reviewer.assignment import batch_assign_reviewers
+from .assign_reviewers import Command as AssignReviewersCommand
+
+class Command(AssignReviewersCommand):
+    help = (
+        'Assigns reviewers to all pending revisions which need them, balancing '
+        'reviewer load across the whole batch. Around deadlines, set '
+        'AUTOMATICALLY_ASSIGN_REVIEWERS = False and run this once submissions are in.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-d', '--days', type=int, help="Days to review")
+        parser.add_argument('--dry-run', action='store_true', 
+                help="Print the proposed assignment without saving it")
+
+    def handle(self, *args, **options):
+        plan = batch_assign_reviewers(days=options['days'], dry_run=options['dry_run'])
+        self.write_plan(plan, options['dry_run'])
@@ -1,3 +1,204 @@
-from django.test import TestCase
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from author.models import Manuscript, ManuscriptAuthorship, Revision
+from reviewer.models import Review
+from .models import JournalIssue
+from reviewer.workload import record_reviews_created, workload_drift
+from reviewer.interactions import record_authorships_acknowledged, record_reviewed_authors, interaction_drift
 
-# Create your tests here.
+# Tests must not share the file-based page cache with the development server
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'public_pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test'},
+}
+
+def make_user(username, **roles):
+    user = User.objects.create(username=username, first_name=username.title(), last_name="Tester")
+    for role, value in roles.items():
+        setattr(user.profile, role, value)
+    user.profile.save()
+    return user
+
+def make_manuscript(authors, status=Revision.StatusChoices.PENDING, reviewers=()):
+    "Creates a manuscript with a single revision and an assigned review per reviewer"
+    manuscript = Manuscript.objects.create()
+    authorships = [ManuscriptAuthorship.objects.create(manuscript=manuscript, author=author, 
+            acknowledged=True) for author in authors]
+    record_authorships_acknowledged(authorships)
+    now = timezone.now()
+    revision = manuscript.revisions.create(
+        title="Manuscript {}".format(manuscript.id),
+        text="<p>Text</p>",
+        revision_number=0,
+        date_created=now,
+        date_submitted=now,
+        date_decided=now,
+        date_published=now,
+        status=status,
+    )
+    manuscript.set_current_revision(revision)
+    for reviewer in reviewers:
+        manuscript.reviewers.add(reviewer)
+        review = Review.objects.create(revision=revision, reviewer=reviewer, date_due=now)
+        record_reviews_created([review])
+        record_reviewed_authors([review])
+    return manuscript
+
+class ListManuscriptsTest(TestCase):
+    def setUp(self):
+        self.editor = make_user("editor", is_editor=True)
+        self.authors = [make_user("author{}".format(i), is_author=True) for i in range(3)]
+        self.reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(2)]
+        self.client.force_login(self.editor)
+
+    def make_manuscripts(self, n):
+        statuses = list(Revision.KANBAN_ASSIGNMENT.keys())
+        for i in range(n):
+            make_manuscript(self.authors[:1 + i % 3], statuses[i % len(statuses)], self.reviewers)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('editor:list_manuscripts'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_manuscripts_sorted_into_columns(self):
+        make_manuscript(self.authors[:1], Revision.StatusChoices.UNSUBMITTED)
+        make_manuscript(self.authors[:2], Revision.StatusChoices.PENDING, self.reviewers)
+        make_manuscript(self.authors[:1], Revision.StatusChoices.ACCEPT)
+        make_manuscript(self.authors[:1], Revision.StatusChoices.PUBLISHED)
+        response = self.client.get(reverse('editor:list_manuscripts'))
+        for col in Revision.KanbanColumns:
+            self.assertEqual(len(response.context[col.name]), 1)
+        pending = response.context['IN_SUBMISSION'][0]
+        self.assertEqual(pending.author_names, "Author0 Tester and Author1 Tester")
+        self.assertEqual([r.status for r in pending.reviews], ['ASSIGNED', 'ASSIGNED'])
+
+    def test_query_count_is_constant(self):
+        self.make_manuscripts(len(Revision.KANBAN_ASSIGNMENT))
+        few = self.count_queries()
+        self.make_manuscripts(100)
+        many = self.count_queries()
+        self.assertEqual(few, many)
+
+    @override_settings(KANBAN_COLUMN_PAGE_SIZE=2)
+    def test_columns_paginate_separately(self):
+        for i in range(5):
+            make_manuscript(self.authors[:1], Revision.StatusChoices.REJECT)
+        make_manuscript(self.authors[:1], Revision.StatusChoices.PENDING)
+        response = self.client.get(reverse('editor:list_manuscripts'), {'decided_page': 3})
+        decided = response.context['DECIDED']
+        self.assertEqual(decided.paginator.count, 5)
+        self.assertEqual(decided.number, 3)
+        self.assertEqual(len(decided.object_list), 1)
+        self.assertEqual(response.context['IN_SUBMISSION'].paginator.count, 1)
+        self.assertEqual(response.context['PUBLISHED'].paginator.count, 0)
+        self.assertContains(response, 'decided_page=2')
+
+class ListReviewsTest(TestCase):
+    def setUp(self):
+        self.editor = make_user("editor", is_editor=True)
+        self.author = make_user("author", is_author=True)
+        self.reviewer = make_user("reviewer", is_reviewer=True)
+        self.client.force_login(self.editor)
+
+    def test_reviews_sorted_into_columns(self):
+        make_manuscript([self.author], reviewers=[self.reviewer])
+        review = Review.objects.get()
+        review.status = Review.StatusChoices.NOT_NEEDED
+        review.save()
+        make_manuscript([self.author], reviewers=[self.reviewer])
+        response = self.client.get(reverse('editor:list_reviews'))
+        self.assertEqual(response.context['ASSIGNED'].paginator.count, 1)
+        self.assertEqual(response.context['SUBMITTED'].paginator.count, 0)
+        self.assertEqual(list(response.context['COMPLETE']), [review])
+
+class DetailViewQueriesTest(TestCase):
+    "Each detail view should look up the revision once and cost a fixed number of queries"
+    expected_queries = {
+        'editor:show_revision': 8,
+        'editor:show_revision_reviews': 7,
+        'editor:edit_revision_editorial_review': 7,
+    }
+
+    def test_query_counts(self):
+        editor = make_user("editor", is_editor=True)
+        author = make_user("author", is_author=True)
+        reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(3)]
+        m = make_manuscript([author], Revision.StatusChoices.PENDING, reviewers)
+        self.client.force_login(editor)
+        for name, expected in self.expected_queries.items():
+            with self.subTest(name), self.assertNumQueries(expected):
+                response = self.client.get(reverse(name, args=(m.id, 0)))
+                self.assertEqual(response.status_code, 200)
+
+@override_settings(CACHES=TEST_CACHES)
+class ShowIssueQueriesTest(TestCase):
+    "An issue's pages should cost the same number of queries however many articles it has"
+    def make_issue(self, authors, n):
+        issue = JournalIssue.objects.create(title="Issue", volume=1, number=1, 
+                introduction="<p>Introduction</p>", published=True)
+        issue.manuscripts.set([make_manuscript(authors, Revision.StatusChoices.PUBLISHED) 
+                for i in range(n)])
+        return issue
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant(self):
+        authors = [make_user("author{}".format(i), is_author=True) for i in range(3)]
+        self.client.force_login(make_user("editor", is_editor=True))
+        small, large = self.make_issue(authors[:1], 1), self.make_issue(authors, 40)
+        for name in ['editor:show_issue', 'public:show_issue']:
+            self.client.get(reverse(name, args=(small.id,)))
+            with self.subTest(name):
+                self.assertEqual(
+                    self.count_queries(reverse(name, args=(small.id,))),
+                    self.count_queries(reverse(name, args=(large.id,))),
+                )
+        response = self.client.get(reverse('editor:show_issue', args=(large.id,)))
+        self.assertEqual(len(response.context['articles']), 40)
+        self.assertEqual(response.context['articles'][0].author_names, 
+                "Author0 Tester, Author1 Tester and Author2 Tester")
+
+@override_settings(NUMBER_OF_REVIEWERS=2)
+class AssignReviewersCommandTest(TestCase):
+    def setUp(self):
+        self.users = [make_user("user{}".format(i), is_author=True, is_reviewer=True) for i in range(6)]
+
+    def assign(self, *args):
+        out = StringIO()
+        call_command('assign_reviewers', *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_assigns_many_manuscripts(self):
+        manuscripts = [make_manuscript(self.users[i:i + 1]) for i in range(3)]
+        self.assign(*[str(m.id) for m in manuscripts[:2]])
+        self.assertEqual([m.reviewers.count() for m in manuscripts], [2, 2, 0])
+        self.assign('--all-pending')
+        self.assertEqual(manuscripts[2].reviewers.count(), 2)
+        self.assertEqual(Review.objects.count(), 6)
+
+    def test_clear_reassigns(self):
+        m = make_manuscript(self.users[:1], reviewers=self.users[1:3])
+        self.assign('--clear', str(m.id))
+        self.assertEqual(Review.objects.count(), 2)
+        self.assertEqual(m.reviewers.count(), 2)
+        self.assertEqual(workload_drift(), [])
+        self.assertEqual(interaction_drift(), [])
+
+    def test_dry_run_saves_nothing(self):
+        m = make_manuscript(self.users[:1], reviewers=self.users[1:3])
+        out = self.assign('--dry-run', '--clear', '--status', 'PENDING')
+        self.assertIn("Dry run", out)
+        self.assertEqual(set(m.reviewers.all()), set(self.users[1:3]))
+        self.assertEqual(Review.objects.count(), 2)
@@ -6,6 +6,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.conf import settings
+from django.db.models import Prefetch
 from author.models import Manuscript, Revision
 from author.mixins import ManuscriptRevisionMixin
 from author.state_machine import RevisionStateMachine
@@ -17,6 +18,9 @@ from editor.forms import (
     EditorialDecisionForm
 )
 from .models import JournalIssue
+from .board import manuscript_board
+from .issues import issue_queryset, issue_articles
+from common.kanban import paginate_kanban_columns
 from .forms import NewJournalIssueForm, EditJournalIssueForm
 from reviewer.email import notify_user_when_review_created
 
@@ -41,30 +45,35 @@ class ListManuscripts(EditorRoleRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         c = super().get_context_data(**kwargs)
-        qs = Manuscript.objects
+        qs = Manuscript.objects.all()
         if 'q' in self.request.GET and self.request.GET['q']:
             qs = qs.filter(authors__username=self.request.GET['q'])
-        qs = qs.count_reviews('num_reviews')
-        qs = qs.count_reviews('num_complete_reviews', status=Review.StatusChoices.COMPLETE)
-        for col, manuscripts in Manuscript.in_kanban_columns(qs.all()).items():
-            c[col.name] = manuscripts
+        c.update(manuscript_board(qs, self.request))
         return c
         
 class ShowManuscript(EditorRoleRequiredMixin, DetailView):
     model = Manuscript
+    queryset = Manuscript.objects.select_related('current_revision')
 
     def get(self, request, *args, **kwargs):
         m = self.get_object()
-        return redirect('editor:show_revision', m.id, m.revisions.last().revision_number)
+        return redirect('editor:show_revision', m.id, m.current_revision.revision_number)
 
 class ShowManuscriptReviews(EditorRoleRequiredMixin, DetailView):
     model = Manuscript
+    queryset = Manuscript.objects.select_related('current_revision')
 
     def get(self, request, *args, **kwargs):
         m = self.get_object()
-        return redirect('editor:show_revision_reviews', m.id, m.revisions.last().revision_number)
+        return redirect('editor:show_revision_reviews', m.id, m.current_revision.revision_number)
 
-class ShowRevision(EditorRoleRequiredMixin, ManuscriptRevisionMixin, DetailView):
+class EditorManuscriptRevisionMixin(ManuscriptRevisionMixin):
+    "Loads the revision along with its reviews and their reviewers."
+    def get_queryset(self):
+        reviews = Review.objects.select_related('reviewer__profile')
+        return Revision.objects.prefetch_related(Prefetch('reviews', queryset=reviews))
+
+class ShowRevision(EditorRoleRequiredMixin, EditorManuscriptRevisionMixin, DetailView):
     model = Revision
     template_name = 'editor/manuscript_revision_detail.html'
     http_method_names = ['get', 'post']
@@ -77,7 +86,7 @@ class ShowRevision(EditorRoleRequiredMixin, ManuscriptRevisionMixin, DetailView)
         c = super().get_context_data(**kwargs)
         revision = self.get_object()
         m = revision.manuscript
-        missing_authorships = m.authorships.filter(acknowledged=False).all()
+        missing_authorships = m.authorships.filter(acknowledged=False).select_related('author')
         missing_authors = [authorship.author for authorship in missing_authorships]
         c['is_waiting_for_authors'] = (len(missing_authors) > 0)
         if len(missing_authors) > 0:
@@ -85,7 +94,7 @@ class ShowRevision(EditorRoleRequiredMixin, ManuscriptRevisionMixin, DetailView)
             c['missing_authors_message'] = msg.format(m.format_names(missing_authors))
         return c
 
-class ShowRevisionReviews(EditorRoleRequiredMixin, ManuscriptRevisionMixin, DetailView):
+class ShowRevisionReviews(EditorRoleRequiredMixin, EditorManuscriptRevisionMixin, DetailView):
     model = Revision
     template_name = 'editor/revision_reviews_detail.html'
 
@@ -113,6 +122,7 @@ class ShowRevisionReviews(EditorRoleRequiredMixin, ManuscriptRevisionMixin, Deta
                 sm.transition(revision, sm.states.REJECT)
             else:
                 return self.invalid_post("Invalid decision '{}'".format(request.POST['recommendation']))
+            self.invalidate_revision()
             return redirect('editor:show_revision_reviews', revision.manuscript_id, revision.revision_number)
         else:
             return self.invalid_post("Invalid action '{}'".format(action))
@@ -122,7 +132,7 @@ class ShowRevisionReviews(EditorRoleRequiredMixin, ManuscriptRevisionMixin, Deta
         messages.add_message(self.request, messages.WARNING, message)
         return redirect('editor:show_revision_reviews', revision.manuscript_id, revision.revision_number)
 
-class EditRevisionEditorialReview(EditorRoleRequiredMixin, ManuscriptRevisionMixin, UpdateView):
+class EditRevisionEditorialReview(EditorRoleRequiredMixin, EditorManuscriptRevisionMixin, UpdateView):
     model = Revision
     template_name = 'editor/edit_revision_editorial_review.html'
     form_class = EditorialReviewForm
@@ -136,11 +146,10 @@ class ListReviews(EditorRoleRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         c = super().get_context_data(**kwargs)
-        qs = Review.objects
+        qs = Review.objects.select_related('revision', 'reviewer')
         if 'q' in self.request.GET and self.request.GET['q']:
             qs = qs.filter(reviewer__username=self.request.GET['q'])
-        for col, reviews in Review.in_kanban_columns(qs.all()).items():
-            c[col.name] = reviews
+        c.update(paginate_kanban_columns(qs, Review.KanbanColumns, self.request))
         return c
        
 class ListIssues(EditorRoleRequiredMixin, ListView):
@@ -150,9 +159,15 @@ class ListIssues(EditorRoleRequiredMixin, ListView):
 
 class ShowIssue(EditorRoleRequiredMixin, DetailView):
     model = JournalIssue
+    queryset = issue_queryset(JournalIssue.objects.all())
     template_name = "editor/issue_detail.html"
     context_object_name = "issue"
 
+    def get_context_data(self, **kwargs):
+        c = super().get_context_data(**kwargs)
+        c['articles'] = issue_articles(self.object)
+        return c
+
 class NewIssue(EditorRoleRequiredMixin, CreateView):
     model = JournalIssue
     form_class = NewJournalIssueForm
@@ -170,8 +185,8 @@ class EditIssue(EditorRoleRequiredMixin, UpdateView):
     def post(self, request, *args, **kwargs):
         result = super().post(request, *args, **kwargs)
         sm = RevisionStateMachine(request)
-        for manuscript in self.get_object().manuscripts.all():
-            revision = manuscript.revisions.last()
+        for manuscript in self.get_object().manuscripts.select_related('current_revision'):
+            revision = manuscript.current_revision
             if revision.status == Revision.StatusChoices.ACCEPT:
                 sm.transition(revision, sm.states.PUBLISHED)
         return result
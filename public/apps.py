@@ -1,6 +1,20 @@
+import os
+import sys
 from django.apps import AppConfig
 
+def serving_requests(argv=None):
+    "Whether this process is a server, rather than a migration or other management command"
+    argv = sys.argv if argv is None else argv
+    return bool(argv) and (os.path.basename(argv[0]) == 'gunicorn' or argv[1:2] == ['runserver'])
+
 
 class PublicConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'public'
+
+    def ready(self):
+        "Connects signals when app is ready, and warms the navigation cache in servers"
+        import public.signals
+        if serving_requests():
+            from .navigation import warm_navigation
+            warm_navigation()
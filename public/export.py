@@ -0,0 +1,242 @@
+import gzip
+import json
+import mimetypes
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import md5
+import django
+from django.conf import settings
+from django.db import connections
+from django_distill.backends import get_backend
+from django_distill.distill import urls_to_distill
+from django_distill.renderer import DistillRender, copy_static, load_urls
+from common.storage import hashed_static_urls
+from .versions import PageVersions
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = '.export-manifest.json'
+COMPRESSED_EXTENSIONS = ['.gz', '.br']
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+def file_hash(path):
+    "The md5 of a file, which is what the publish backends compare"
+    digest = md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(output_dir):
+    """The manifest records, for each page, the version of the content it was
+    rendered from and the file it was written to; and for each file, its hash
+    when it was last written and when it was last published.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'pages': {}, 'files': {}, 'published': {}}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+class Page:
+    "A page of the static site, which may need to be rendered"
+    def __init__(self, uri, file_name, view_name, params, version):
+        self.uri = uri
+        self.file_name = file_name
+        self.view_name = view_name
+        self.params = params
+        self.version = version
+
+    def task(self):
+        "What a worker process needs to render the page, which can be pickled"
+        return (self.uri, self.file_name, self.view_name, self.params)
+
+def site_pages(renderer, versions):
+    "Lists every page registered with distill, with its content version"
+    pages = []
+    for url, distill_func, file_name, status_codes, view_name, a, k in urls_to_distill:
+        for params in renderer.get_uri_values(distill_func, view_name):
+            params = params or {}
+            uri = renderer.generate_uri(url, view_name, params)
+            if file_name is None and uri.endswith('/'):
+                page_file = uri.lstrip('/') + 'index.html'
+            else:
+                page_file = file_name or uri.lstrip('/')
+            version = versions.version(view_name, params) if isinstance(params, dict) else None
+            pages.append(Page(uri, page_file, view_name, params, version))
+    return pages
+
+def render_pages(output_dir, tasks):
+    """Renders each page to its file, given tasks from `Page.task`. 
+    Returns the files' hashes, in the order of the tasks.
+    """
+    renderer = DistillRender(output_dir, urls_to_distill)
+    views = {view_name: (status_codes, a) 
+            for url, func, file_name, status_codes, view_name, a, k in urls_to_distill}
+    hashes = []
+    for uri, file_name, view_name, params in tasks:
+        status_codes, view_args = views[view_name]
+        with hashed_static_urls():
+            response = renderer.render_view(uri, status_codes, params, view_args)
+        path = os.path.join(output_dir, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        hashes.append(md5(response.content).hexdigest())
+    return hashes
+
+def init_worker():
+    "Sets up Django in a worker process, which opens its own database connection"
+    django.setup()
+
+def render_pages_in_pool(output_dir, tasks, jobs):
+    """Renders pages across a pool of `jobs` processes. Each page is written to
+    its own file, so the output does not depend on which worker renders it.
+    """
+    chunks = [tasks[i::jobs] for i in range(jobs)]
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker) as pool:
+        chunk_hashes = list(pool.map(render_pages, [output_dir] * jobs, chunks))
+    hashes = [None] * len(tasks)
+    for i, chunk in enumerate(chunk_hashes):
+        hashes[i::jobs] = chunk
+    return hashes
+
+def export_site(output_dir, force=False, static=False, jobs=1, log=print):
+    """Renders the public site into `output_dir`, skipping pages whose content
+    version has not changed since they were last rendered there. With `force`,
+    every page is rendered. With `static`, static and media files are copied
+    too; otherwise those copied by earlier exports are kept. New and changed
+    HTML, CSS and JS files are then compressed by `compress_file`. With `jobs` 
+    greater than one, pages are rendered and compressed by pools of processes.
+    Returns the pages rendered and the pages skipped.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    load_urls(log)
+    renderer = DistillRender(output_dir, urls_to_distill)
+    old_pages, old_files = manifest['pages'], manifest['files']
+    pages, files = {}, {}
+    rendered, skipped = [], []
+    for page in site_pages(renderer, PageVersions()):
+        old = old_pages.get(page.uri)
+        if (not force and page.version and old and old['version'] == page.version
+                and old['file'] in old_files
+                and os.path.exists(os.path.join(output_dir, page.file_name))):
+            files[page.file_name] = old_files[page.file_name]
+            skipped.append(page)
+        else:
+            log("Rendering {} -> {}".format(page.uri, page.file_name))
+            rendered.append(page)
+        pages[page.uri] = {'version': page.version, 'file': page.file_name}
+    tasks = [page.task() for page in rendered]
+    if jobs > 1 and len(tasks) > 1:
+        hashes = render_pages_in_pool(output_dir, tasks, min(jobs, len(tasks)))
+    else:
+        hashes = render_pages(output_dir, tasks)
+    for page, page_hash in zip(rendered, hashes):
+        files[page.file_name] = page_hash
+    page_files = {p['file'] for p in old_pages.values()}
+    for path in page_files - set(files):
+        for name in [path] + [path + ext for ext in COMPRESSED_EXTENSIONS]:
+            if os.path.exists(os.path.join(output_dir, name)):
+                os.remove(os.path.join(output_dir, name))
+    if static:
+        for path, to_path in copy_static_files(output_dir, log):
+            files[path] = file_hash(to_path)
+    else:
+        files.update({path: h for path, h in old_files.items() if path not in page_files})
+    compress_files([os.path.join(output_dir, path) for path, h in files.items()
+            if compressible(path) and (old_files.get(path) != h 
+            or not os.path.exists(os.path.join(output_dir, path + '.gz')))], jobs)
+    manifest['pages'], manifest['files'] = pages, files
+    save_manifest(output_dir, manifest)
+    return rendered, skipped
+
+def compressible(path):
+    return os.path.splitext(path)[1] in settings.EXPORT_COMPRESS_EXTENSIONS
+
+def compress_file(path):
+    """Writes a gzipped copy of the file beside it, and a brotli copy if brotli
+    is installed, for servers which send precompressed files.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(content))
+
+def compress_files(paths, jobs=1):
+    "Compresses the files, in a pool of `jobs` processes if there is more than one"
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(compress_file, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    else:
+        for path in paths:
+            compress_file(path)
+
+def upload_metadata(local_path):
+    """Returns the S3 metadata for an exported file. Pages may change, so
+    proxies and browsers must check them often. Static files named by their
+    hash never change, so they may be cached for a year. Files with a gzipped
+    copy are uploaded compressed.
+    """
+    if local_path.endswith('.html'):
+        cache_control = settings.EXPORT_PAGE_CACHE_CONTROL
+    elif HASHED_NAME.search(local_path):
+        cache_control = settings.EXPORT_HASHED_ASSET_CACHE_CONTROL
+    else:
+        cache_control = settings.EXPORT_ASSET_CACHE_CONTROL
+    metadata = {
+        'ContentType': mimetypes.guess_type(local_path)[0] or 'application/octet-stream',
+        'CacheControl': cache_control,
+    }
+    if compressible(local_path) and os.path.exists(local_path + '.gz'):
+        metadata['ContentEncoding'] = 'gzip'
+    return metadata
+
+def copy_static_files(output_dir, log):
+    "Copies static and media files as distill does. Yields their relative and full paths."
+    for url, root in [(settings.STATIC_URL, settings.STATIC_ROOT), (settings.MEDIA_URL, settings.MEDIA_ROOT)]:
+        if root and os.path.isdir(root):
+            for from_path, to_path in copy_static(str(root), os.path.join(output_dir, str(url).lstrip('/'))):
+                log("Copying {} -> {}".format(from_path, to_path))
+                yield os.path.relpath(to_path, output_dir), to_path
+
+def publish_changes(output_dir, target_name='default', log=print):
+    """Uploads the exported files which have changed since they were last
+    published to the DISTILL_PUBLISH target, and deletes files which are no
+    longer exported. Returns the numbers of files uploaded and deleted.
+    """
+    manifest = load_manifest(output_dir)
+    target = settings.DISTILL_PUBLISH[target_name]
+    backend = get_backend(target['ENGINE'])(output_dir, target)
+    backend.authenticate()
+    files, published = manifest['files'], manifest['published']
+    changed = sorted(path for path, h in files.items() if published.get(path) != h)
+    removed = sorted(set(published) - set(files))
+    try:
+        for path in changed:
+            local_path = os.path.join(output_dir, path)
+            log("Publishing {}".format(path))
+            backend.upload_file(local_path, backend.remote_path(local_path))
+            published[path] = files[path]
+        for path in removed:
+            log("Deleting remote {}".format(path))
+            backend.delete_remote_file(backend.remote_path(os.path.join(output_dir, path)))
+            del published[path]
+    finally:
+        save_manifest(output_dir, manifest)
+    return len(changed), len(removed)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from time import perf_counter
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from author.models import Manuscript, ManuscriptAuthorship, Revision
+from editor.models import JournalIssue
+from public.export import export_site, file_hash, MANIFEST_NAME
+
+PARAGRAPH = "<p>" + "Apprenticeship in thinking, made visible through worked examples. " * 20 + "</p>\n"
+
+class Command(BaseCommand):
+    help = (
+        "Times export_site over a synthetic corpus of published issues with each "
+        "number of jobs, and checks that every run writes identical files. Worker "
+        "processes can only see committed data, so the corpus is saved to the "
+        "database and deleted afterwards. It refuses to run unless DEBUG is on or "
+        "--yes-really is given. A corpus left by an interrupted run is deleted first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-i', '--issues', type=int, default=50)
+        parser.add_argument('-m', '--manuscripts', type=int, default=30, 
+                help="Manuscripts per issue")
+        parser.add_argument('-p', '--paragraphs', type=int, default=40, 
+                help="Paragraphs of revision text per manuscript")
+        parser.add_argument('-j', '--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+        parser.add_argument('--yes-really', action='store_true',
+                help="Run even though DEBUG is off, saving the corpus to this database")
+
+    def handle(self, *args, **options):
+        if not (settings.DEBUG or options['yes_really']):
+            raise CommandError("benchmark_export saves a published corpus to the database; "
+                    "run it with DEBUG on, or pass --yes-really")
+        prefix = "benchexport_"
+        self.delete_corpus(prefix)
+        try:
+            self.create_corpus(prefix, options['issues'], options['manuscripts'], options['paragraphs'])
+            self.stdout.write("{:>6} {:>8} {:>12} {:>10}".format("jobs", "pages", "seconds", "speedup"))
+            baseline, expected = None, None
+            for jobs in options['jobs']:
+                output_dir = tempfile.mkdtemp()
+                try:
+                    start = perf_counter()
+                    rendered, skipped = export_site(output_dir, force=True, jobs=jobs, log=lambda msg: None)
+                    duration = perf_counter() - start
+                    hashes = self.output_hashes(output_dir)
+                finally:
+                    shutil.rmtree(output_dir)
+                baseline = baseline or duration
+                expected = expected or hashes
+                if hashes != expected:
+                    self.stderr.write("Output with {} jobs differs".format(jobs))
+                self.stdout.write("{:>6} {:>8} {:>12.3f} {:>10.2f}".format(
+                        jobs, len(rendered), duration, baseline / duration))
+        finally:
+            self.delete_corpus(prefix)
+
+    def output_hashes(self, output_dir):
+        hashes = {}
+        for root, dirs, files in os.walk(output_dir):
+            for name in files:
+                if name != MANIFEST_NAME:
+                    path = os.path.join(root, name)
+                    hashes[os.path.relpath(path, output_dir)] = file_hash(path)
+        return hashes
+
+    def create_corpus(self, prefix, num_issues, per_issue, paragraphs):
+        now = timezone.now()
+        User.objects.bulk_create([User(username=prefix + str(i), first_name="Author", 
+                last_name=str(i)) for i in range(per_issue)])
+        authors = list(User.objects.filter(username__startswith=prefix))
+        Manuscript.objects.bulk_create([Manuscript() for i in range(num_issues * per_issue)])
+        manuscripts = list(Manuscript.objects.order_by('-pk')[:num_issues * per_issue])
+        ManuscriptAuthorship.objects.bulk_create([
+            ManuscriptAuthorship(manuscript=m, author=authors[i % per_issue], acknowledged=True)
+            for i, m in enumerate(manuscripts)
+        ])
+        Revision.objects.bulk_create([
+            Revision(manuscript=m, title="{}manuscript {}".format(prefix, m.id), 
+                    text=PARAGRAPH * paragraphs, revision_number=0, date_created=now,
+                    status=Revision.StatusChoices.PUBLISHED)
+            for m in manuscripts
+        ])
+        revisions = {r.manuscript_id: r for r in Revision.objects.filter(manuscript__in=manuscripts)}
+        for m in manuscripts:
+            m.current_revision = revisions[m.id]
+        Manuscript.objects.bulk_update(manuscripts, ['current_revision'])
+        JournalIssue.objects.bulk_create([
+            JournalIssue(title="{}issue {}".format(prefix, i), volume=1000, number=i, 
+                    introduction=PARAGRAPH, published=True, date_published=now)
+            for i in range(num_issues)
+        ])
+        issues = list(JournalIssue.objects.filter(title__startswith=prefix).order_by('number'))
+        JournalIssue.manuscripts.through.objects.bulk_create([
+            JournalIssue.manuscripts.through(journalissue=issue, manuscript=m)
+            for i, issue in enumerate(issues)
+            for m in manuscripts[i * per_issue:(i + 1) * per_issue]
+        ])
+
+    def delete_corpus(self, prefix):
+        JournalIssue.objects.filter(title__startswith=prefix).delete()
+        Manuscript.objects.filter(authors__username__startswith=prefix).delete()
+        User.objects.filter(username__startswith=prefix).delete()
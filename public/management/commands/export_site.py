@@ -0,0 +1,37 @@
+from time import perf_counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from public.export import export_site, publish_changes
+
+class Command(BaseCommand):
+    help = (
+        "Exports the public site into a directory, rendering only the pages whose "
+        "content has changed since the last export there. With --publish, uploads "
+        "only the files which have changed since they were last published."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir')
+        parser.add_argument('--force', action='store_true', help="Render every page")
+        parser.add_argument('--static', action='store_true', help="Copy static and media files")
+        parser.add_argument('-j', '--jobs', type=int, default=1, 
+                help="Render pages in this many processes")
+        parser.add_argument('--publish', nargs='?', const='default', metavar='TARGET',
+                help="Publish changed files to this DISTILL_PUBLISH target")
+        parser.add_argument('-q', '--quiet', action='store_true')
+
+    def handle(self, *args, **options):
+        log = (lambda msg: None) if options['quiet'] else self.stdout.write
+        target = options['publish']
+        if target and target not in getattr(settings, 'DISTILL_PUBLISH', {}):
+            raise CommandError("Invalid publish target: {}".format(target))
+        start = perf_counter()
+        rendered, skipped = export_site(options['output_dir'], force=options['force'], 
+                static=options['static'], jobs=options['jobs'], log=log)
+        duration = perf_counter() - start
+        self.stdout.write("Rendered {} pages ({} unchanged) with {} jobs in {:.3f}s ({:.1f} pages/s)".format(
+                len(rendered), len(skipped), options['jobs'], duration, len(rendered) / duration))
+        if target:
+            uploaded, deleted = publish_changes(options['output_dir'], target, log=log)
+            self.stdout.write("Published {} files and deleted {} to {}".format(
+                    uploaded, deleted, target))
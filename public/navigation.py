@@ -0,0 +1,49 @@
+from uuid import uuid4
+from django.db import DatabaseError, connections
+from editor.models import JournalIssue
+from .page_cache import page_cache
+
+VERSION_KEY = "public:navigation:version"
+NAVIGATION_KEY = "public:navigation:{}"
+
+class IssueLink:
+    "The fields of a published issue needed to list and link to it"
+    def __init__(self, id, title, volume, number):
+        self.id = id
+        self.title = title
+        self.volume = volume
+        self.number = number
+
+def published_issue_navigation():
+    """Returns IssueLinks for the published issues, newest first. The list is
+    cached under a version which `invalidate_navigation` replaces, in the page
+    cache so that every worker process sees invalidations.
+    """
+    cache = page_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    key = NAVIGATION_KEY.format(version)
+    navigation = cache.get(key)
+    if navigation is None:
+        navigation = [IssueLink(*fields) for fields in JournalIssue.objects.filter(published=True)
+                .values_list('id', 'title', 'volume', 'number')]
+        cache.set(key, navigation, None)
+    return navigation
+
+def invalidate_navigation():
+    page_cache().set(VERSION_KEY, uuid4().hex, None)
+
+def warm_navigation():
+    """Fills the navigation cache when the server starts, so the first visitor
+    need not wait for it. Errors, such as tables which are not yet migrated,
+    are ignored. The connection is closed so that gunicorn workers forked 
+    after a preloaded app do not share it.
+    """
+    try:
+        published_issue_navigation()
+    except DatabaseError:
+        pass
+    finally:
+        connections.close_all()
@@ -0,0 +1,96 @@
+from hashlib import md5
+from time import time
+from uuid import uuid4
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from editor.models import JournalIssue
+from .versions import template_version
+
+VERSION_KEY = "public:version:{}"
+PAGE_KEY = "public:page:{}:{}:{}"
+
+def page_cache():
+    return caches[settings.PUBLIC_PAGE_CACHE]
+
+def page_version(name):
+    """Returns the current version of a page, a dict with a random `token` and
+    the time the page last `modified`. Cached copies of the page are keyed on
+    the token, so a new version makes them unreachable.
+    """
+    cache = page_cache()
+    version = cache.get(VERSION_KEY.format(name))
+    if version is None:
+        cache.add(VERSION_KEY.format(name), {'token': uuid4().hex, 'modified': time()}, None)
+        version = cache.get(VERSION_KEY.format(name))
+    return version
+
+def invalidate_issue_pages(issue_ids):
+    """Starts new versions of the pages of the given issues and of the home
+    page. This should be called after changes to issues or their manuscripts 
+    are committed.
+    """
+    now = time()
+    page_cache().set_many({
+        VERSION_KEY.format(name): {'token': uuid4().hex, 'modified': now}
+        for name in ['home'] + ['issue:{}'.format(pk) for pk in issue_ids]
+    }, None)
+
+def invalidate_manuscript_pages(manuscript_ids):
+    "Invalidates the pages of every issue containing the manuscripts, if there are any"
+    issue_ids = list(JournalIssue.objects.filter(manuscripts__in=manuscript_ids)
+            .values_list('pk', flat=True).distinct())
+    if issue_ids:
+        invalidate_issue_pages(issue_ids)
+
+class CachedPageMixin:
+    """Serves a view's page from the page cache to anonymous users, with a 
+    strong ETag and Last-Modified, answering conditional requests with 304 
+    Not Modified. Requests from logged-in users, or with messages waiting to 
+    be shown, are rendered as usual and not cached. Pages are named by 
+    `page_name`, from the view and its URL parameters unless the view names 
+    them as `invalidate_issue_pages` expects. Cached copies are keyed on the page's version and on 
+    `template_version`, so a deploy which changes the templates or static 
+    files does not serve pages rendered before it.
+    """
+    def page_name(self):
+        return '{}:{}'.format(type(self).__name__, 
+                ','.join('{}={}'.format(k, v) for k, v in sorted(self.kwargs.items())))
+
+    def page_cacheable(self, request):
+        "Requests without a user, such as distill's, are rendered as usual"
+        user = getattr(request, 'user', None)
+        return (request.method in ('GET', 'HEAD') and user is not None 
+                and not user.is_authenticated and not len(get_messages(request)))
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+        version = page_version(self.page_name())
+        key = PAGE_KEY.format(self.page_name(), version['token'], template_version())
+        page = page_cache().get(key)
+        if page is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            page = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(md5(response.content).hexdigest()),
+                'last_modified': int(version['modified']),
+            }
+            page_cache().set(key, page, None)
+        response = get_conditional_response(request, etag=page['etag'], 
+                last_modified=page['last_modified'])
+        if response is None:
+            response = HttpResponse(page['content'], content_type=page['content_type'])
+        response['ETag'] = page['etag']
+        response['Last-Modified'] = http_date(page['last_modified'])
+        patch_cache_control(response, public=True, max_age=0, 
+                s_maxage=settings.PUBLIC_PAGE_PROXY_MAX_AGE)
+        return response
@@ -0,0 +1,30 @@
+from django.core.exceptions import ImproperlyConfigured
+from .export import upload_metadata
+
+# This module is only imported by get_backend when the site is published, so
+# boto3 need not be installed to run or export the site.
+try:
+    import boto3
+    from django_distill.backends.amazon_s3 import AmazonS3Backend
+except ImportError as e:
+    raise ImproperlyConfigured("Publishing to S3 requires boto3: pip install boto3") from e
+
+class CompressedS3Backend(AmazonS3Backend):
+    """Publishes to S3 with each file's Content-Type and Cache-Control. Files
+    which the export gzipped are uploaded compressed, with Content-Encoding.
+    """
+    def authenticate(self, calling_format=None):
+        session = boto3.session.Session(
+            aws_access_key_id=self.account_username(),
+            aws_secret_access_key=self.options.get('SECRET_ACCESS_KEY', ''),
+        )
+        self.d['connection'] = session.client('s3')
+        self.d['bucket'] = session.resource('s3').Bucket(self.account_container())
+
+    def upload_file(self, local_name, remote_name):
+        metadata = upload_metadata(local_name)
+        if metadata.get('ContentEncoding') == 'gzip':
+            local_name += '.gz'
+        return self.d['bucket'].upload_file(local_name, remote_name, ExtraArgs=metadata)
+
+backend_class = CompressedS3Backend
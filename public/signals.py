@@ -0,0 +1,57 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from author.models import Manuscript, ManuscriptAuthorship, Revision
+from editor.models import JournalIssue
+from .navigation import invalidate_navigation
+from .page_cache import invalidate_issue_pages, invalidate_manuscript_pages
+
+# Fields of a user shown on the public pages, as an author's name
+PUBLIC_USER_FIELDS = {'first_name', 'last_name'}
+
+@receiver(post_save, sender=JournalIssue, dispatch_uid="invalidate_navigation_after_issue_saved")
+@receiver(post_delete, sender=JournalIssue, dispatch_uid="invalidate_navigation_after_issue_deleted")
+def invalidate_navigation_after_issue_changed(sender, instance, **kwargs):
+    "When an issue changes, invalidate the navigation and its pages once the change commits"
+    transaction.on_commit(invalidate_navigation)
+    transaction.on_commit(partial(invalidate_issue_pages, [instance.id]))
+
+@receiver(m2m_changed, sender=JournalIssue.manuscripts.through, 
+        dispatch_uid="invalidate_pages_after_issue_manuscripts_changed")
+def invalidate_pages_after_issue_manuscripts_changed(sender, instance, action, pk_set, **kwargs):
+    "When an issue's manuscripts change, invalidate the navigation and the affected pages"
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, JournalIssue):
+        issue_ids = [instance.id]
+    elif action == 'pre_clear':
+        issue_ids = list(instance.issues.values_list('pk', flat=True))
+    else:
+        issue_ids = list(pk_set)
+    transaction.on_commit(invalidate_navigation)
+    transaction.on_commit(partial(invalidate_issue_pages, issue_ids))
+
+@receiver(post_save, sender=Revision, dispatch_uid="invalidate_pages_after_revision_saved")
+def invalidate_pages_after_revision_saved(sender, instance, **kwargs):
+    "A revision's title and text are shown on the pages of issues containing its manuscript"
+    transaction.on_commit(partial(invalidate_manuscript_pages, [instance.manuscript_id]))
+
+@receiver(post_save, sender=ManuscriptAuthorship, 
+        dispatch_uid="invalidate_pages_after_authorship_saved")
+@receiver(post_delete, sender=ManuscriptAuthorship, 
+        dispatch_uid="invalidate_pages_after_authorship_deleted")
+def invalidate_pages_after_authorship_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_manuscript_pages, [instance.manuscript_id]))
+
+@receiver(post_save, sender=User, dispatch_uid="invalidate_pages_after_user_saved")
+def invalidate_pages_after_user_saved(sender, instance, created, update_fields, **kwargs):
+    """When an author's name may have changed, invalidate the pages listing 
+    their manuscripts. Saves of other fields, such as `last_login`, are ignored.
+    """
+    if created or (update_fields is not None and not PUBLIC_USER_FIELDS & set(update_fields)):
+        return
+    manuscript_ids = list(Manuscript.objects.filter(authors=instance).values_list('pk', flat=True))
+    if manuscript_ids:
+        transaction.on_commit(partial(invalidate_manuscript_pages, manuscript_ids))
@@ -1,3 +1,278 @@
-from django.test import TestCase
+import gzip
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from author.models import Revision
+from editor.models import JournalIssue
+from editor.tests import make_user, make_manuscript, TEST_CACHES
+from .export import export_site, publish_changes, load_manifest, upload_metadata
+from .page_cache import page_cache, CachedPageMixin
+from .navigation import published_issue_navigation, warm_navigation
+from .apps import serving_requests
 
-# Create your tests here.
+class FakeBackend:
+    "Records uploads and deletions instead of publishing"
+    uploaded = []
+    deleted = []
+
+    def __init__(self, source_dir, options):
+        self.source_dir = os.path.join(source_dir, '')
+
+    def authenticate(self):
+        pass
+
+    def remote_path(self, local_name):
+        return local_name[len(self.source_dir):]
+
+    def upload_file(self, local_name, remote_name):
+        self.uploaded.append(remote_name)
+
+    def delete_remote_file(self, remote_name):
+        self.deleted.append(remote_name)
+
+class InlineExecutor:
+    "Runs a process pool's work in this process, which can see the test database"
+    def __init__(self, max_workers, initializer=None):
+        if initializer:
+            initializer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def map(self, func, *iterables, chunksize=1):
+        return map(func, *iterables)
+
+def make_issue(number, manuscripts, published=True):
+    issue = JournalIssue.objects.create(title="Issue {}".format(number), volume=1, number=number,
+            introduction="<p>Introduction</p>", published=published)
+    issue.manuscripts.set(manuscripts)
+    return issue
+
+@override_settings(DISTILL_PUBLISH={'default': {'ENGINE': 'fake'}}, CACHES=TEST_CACHES)
+class IncrementalExportTest(TestCase):
+    def setUp(self):
+        page_cache().clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        author = make_user("author", is_author=True)
+        self.manuscripts = [make_manuscript([author], Revision.StatusChoices.PUBLISHED)
+                for i in range(2)]
+        self.issues = [make_issue(i + 1, [m]) for i, m in enumerate(self.manuscripts)]
+        make_issue(3, [], published=False)
+
+    def export(self, **kwargs):
+        rendered, skipped = export_site(self.dir, log=lambda msg: None, **kwargs)
+        return sorted(page.uri for page in rendered)
+
+    def publish(self):
+        FakeBackend.uploaded, FakeBackend.deleted = [], []
+        with mock.patch('public.export.get_backend', return_value=FakeBackend):
+            publish_changes(self.dir, log=lambda msg: None)
+        return sorted(FakeBackend.uploaded), sorted(FakeBackend.deleted)
+
+    def test_only_changed_pages_are_rendered(self):
+        issue_uris = ['/issues/{}/'.format(issue.id) for issue in self.issues]
+        self.assertEqual(self.export(), ['/'] + issue_uris)
+        self.assertEqual(self.export(), [])
+        revision = self.manuscripts[0].current_revision
+        revision.text = "<p>Corrected text</p>"
+        revision.save()
+        self.assertEqual(self.export(), [issue_uris[0]])
+        with open(os.path.join(self.dir, 'issues', str(self.issues[0].id), 'index.html')) as f:
+            self.assertIn("Corrected text", f.read())
+        self.issues[1].title = "Renamed"
+        self.issues[1].save()
+        self.assertEqual(self.export(), ['/', issue_uris[1]])
+        self.assertEqual(len(self.export(force=True)), 3)
+
+    def test_only_changed_files_are_published(self):
+        self.export()
+        uploaded, deleted = self.publish()
+        self.assertEqual(len(uploaded), 3)
+        self.assertEqual(self.publish(), ([], []))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issues[0].published = False
+            self.issues[0].save()
+        self.export()
+        uploaded, deleted = self.publish()
+        self.assertEqual(uploaded, ['index.html'])
+        self.assertEqual(deleted, ['issues/{}/index.html'.format(self.issues[0].id)])
+        self.assertNotIn('/issues/{}/'.format(self.issues[0].id), load_manifest(self.dir)['pages'])
+
+    def test_pages_are_precompressed(self):
+        self.export()
+        path = os.path.join(self.dir, 'index.html')
+        with open(path, 'rb') as f, gzip.open(path + '.gz') as gz:
+            self.assertEqual(f.read(), gz.read())
+        metadata = upload_metadata(path)
+        self.assertEqual(metadata['ContentType'], 'text/html')
+        self.assertEqual(metadata['ContentEncoding'], 'gzip')
+        self.assertNotIn('immutable', metadata['CacheControl'])
+        self.assertIn('immutable', upload_metadata('static/base/style.0123456789ab.css')['CacheControl'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issues[0].published = False
+            self.issues[0].save()
+        self.export()
+        self.assertFalse(os.path.exists(os.path.join(self.dir, 'issues', str(self.issues[0].id), 
+                'index.html.gz')))
+
+    def test_s3_backend_explains_missing_boto3(self):
+        with mock.patch.dict(sys.modules, {'boto3': None, 'public.s3_backend': None}):
+            del sys.modules['public.s3_backend']
+            with self.assertRaisesMessage(ImproperlyConfigured, "pip install boto3"):
+                importlib.import_module('public.s3_backend')
+
+    @override_settings(DEBUG=False)
+    def test_benchmark_refuses_to_run_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_export', issues=1, manuscripts=1)
+        self.assertEqual(JournalIssue.objects.count(), 3)
+
+    def test_parallel_export_matches_serial_export(self):
+        make_issue(4, self.manuscripts)
+        self.export()
+        serial_dir = self.dir
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        with mock.patch('public.export.ProcessPoolExecutor', InlineExecutor):
+            self.assertEqual(len(self.export(jobs=3)), 4)
+        self.assertEqual(load_manifest(self.dir)['files'], load_manifest(serial_dir)['files'])
+
+@override_settings(CACHES=TEST_CACHES)
+class PageCacheTest(TestCase):
+    def setUp(self):
+        page_cache().clear()
+        self.author = make_user("author", is_author=True)
+        self.manuscript = make_manuscript([self.author], Revision.StatusChoices.ACCEPT)
+        self.issue = make_issue(1, [self.manuscript])
+        self.url = reverse('public:show_issue', args=(self.issue.id,))
+
+    def test_pages_are_cached_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "Issue 1")
+        self.assertIn("s-maxage", response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_default_page_name_comes_from_url_parameters(self):
+        view = CachedPageMixin()
+        view.kwargs = {'slug': "about", 'pk': 3}
+        self.assertEqual(view.page_name(), "CachedPageMixin:pk=3,slug=about")
+
+    def test_logged_in_users_are_not_served_cached_pages(self):
+        self.client.get(self.url)
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Log out")
+        self.assertNotIn('ETag', response)
+
+    def test_editing_an_issue_invalidates_its_pages(self):
+        etag = self.client.get(self.url)['ETag']
+        home_etag = self.client.get(reverse('public:home_page'))['ETag']
+        editor = make_user("editor", is_editor=True)
+        self.client.force_login(editor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('editor:edit_issue', args=(self.issue.id,)), {
+                'title': "Renamed", 'introduction': "<p>Introduction</p>", 'volume': 1, 
+                'number': 1, 'published': True, 'manuscripts': [self.manuscript.id],
+            })
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Renamed")
+        self.assertContains(response, "<p>Text</p>")
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertNotEqual(self.client.get(reverse('public:home_page'))['ETag'], home_etag)
+        self.manuscript.current_revision.refresh_from_db()
+        self.assertEqual(self.manuscript.current_revision.status, Revision.StatusChoices.PUBLISHED)
+
+    def test_renaming_an_author_invalidates_their_pages(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('roles:edit'), {'first_name': "Renamed", 'last_name': "Author"})
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertContains(response, "Renamed Author")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_editing_a_revision_invalidates_its_pages(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            revision = Revision.objects.get(pk=self.manuscript.current_revision.pk)
+            revision.title = "Corrected title"
+            revision.save()
+        self.assertContains(self.client.get(self.url), "Corrected title")
+
+    def test_changed_templates_are_not_served_from_the_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch('public.page_cache.template_version', return_value="0" * 64):
+            with mock.patch('public.views.ShowIssue.template_name', "public/home_page.html"):
+                response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+
+@override_settings(CACHES=TEST_CACHES)
+class NavigationCacheTest(TestCase):
+    def setUp(self):
+        page_cache().clear()
+        author = make_user("author", is_author=True)
+        self.manuscripts = [make_manuscript([author], Revision.StatusChoices.PUBLISHED) 
+                for i in range(3)]
+        self.issue = make_issue(1, self.manuscripts[:2])
+
+    def titles(self):
+        return [issue.title for issue in published_issue_navigation()]
+
+    def test_navigation_is_cached_until_issues_change(self):
+        self.assertEqual(self.titles(), ["Issue 1"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(), ["Issue 1"])
+        with self.captureOnCommitCallbacks(execute=True):
+            make_issue(2, [])
+        self.assertEqual(self.titles(), ["Issue 2", "Issue 1"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issue.published = False
+            self.issue.save()
+        self.assertEqual(self.titles(), ["Issue 2"])
+
+    def test_navigation_is_warmed_by_servers_only(self):
+        self.assertTrue(serving_requests(['/opt/lai615/env/bin/gunicorn', 'cognitive_apprenticeship.wsgi']))
+        self.assertTrue(serving_requests(['manage.py', 'runserver']))
+        self.assertFalse(serving_requests(['manage.py', 'migrate']))
+        self.assertFalse(serving_requests(['manage.py', 'test']))
+        with mock.patch('public.navigation.connections'):
+            warm_navigation()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(), ["Issue 1"])
+
+    def test_home_page_lists_manuscripts_of_each_issue(self):
+        make_issue(2, self.manuscripts[1:])
+        response = self.client.get(reverse('public:home_page'))
+        issues = response.context['issues']
+        self.assertEqual([len(issue.manuscripts) for issue in issues], [2, 2])
+        with self.assertNumQueries(0):
+            self.client.get(reverse('public:home_page'))
+
+    def test_changing_manuscripts_invalidates_home_page(self):
+        etag = self.client.get(reverse('public:home_page'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.manuscripts[2].issues.add(self.issue)
+        response = self.client.get(reverse('public:home_page'))
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.context['issues'][0].manuscripts), 3)
@@ -3,8 +3,8 @@ from editor.models import JournalIssue
 from . import views
 
 def get_all_issues():
-    for issue in JournalIssue.objects.all():
-        yield {'pk': issue.id}
+    for pk in JournalIssue.objects.filter(published=True).values_list('pk', flat=True):
+        yield {'pk': pk}
 
 app_name = "public"
 urlpatterns = [
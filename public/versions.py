@@ -0,0 +1,74 @@
+from hashlib import sha256
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.loader import get_template
+from editor.models import JournalIssue
+from editor.issues import issue_queryset, issue_articles
+
+PUBLIC_TEMPLATES = [
+    'base.html',
+    'menu.html',
+    'public/base.html',
+    'public/home_page.html',
+    'public/issue_detail.html',
+]
+
+def content_hash(*parts):
+    "Hashes strings and numbers, separating them so that ('ab', 'c') != ('a', 'bc')"
+    digest = sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def template_version():
+    """Changes whenever a template used by the public pages is edited, or a
+    static file they link to is collected with a new hashed name
+    """
+    sources = [get_template(name).template.source for name in PUBLIC_TEMPLATES]
+    static_names = sorted(getattr(staticfiles_storage, 'hashed_files', {}).items())
+    return content_hash(*sources, *static_names)
+
+def published_issues():
+    "Published issues, with everything their public pages show"
+    return issue_queryset(JournalIssue.objects.filter(published=True))
+
+def issue_summary(issue):
+    "The fields of an issue and its manuscripts shown on the home page"
+    parts = [issue.id, issue.title, issue.volume, issue.number]
+    for article in issue_articles(issue):
+        parts += [article.id, article.title, article.author_names]
+    return parts
+
+def issue_version(issue):
+    """Changes whenever anything shown on the issue's page changes: the issue's
+    fields, or the title, authors or current revision text of its manuscripts.
+    """
+    parts = issue_summary(issue) + [issue.introduction, settings.EDITOR_NAMES]
+    parts += [article.text for article in issue_articles(issue)]
+    return content_hash(*parts)
+
+def home_page_version(issues):
+    "Changes whenever the summary of any published issue changes"
+    return content_hash(settings.EDITOR_NAMES, *(p for issue in issues for p in issue_summary(issue)))
+
+class PageVersions:
+    """Content versions of the pages of the public site, keyed by view name and
+    URL parameters. Pages whose version has not changed need not be rendered
+    again. Versions are computed together, in a constant number of queries.
+    """
+    def __init__(self):
+        issues = list(published_issues())
+        self.template_version = template_version()
+        self.home_page = home_page_version(issues)
+        self.issues = {issue.id: issue_version(issue) for issue in issues}
+
+    def version(self, view_name, params):
+        "Returns the page's version, or None if it is unknown and must always be rendered"
+        if view_name == 'home_page':
+            page_version = self.home_page
+        elif view_name == 'show_issue' and params.get('pk') in self.issues:
+            page_version = self.issues[params['pk']]
+        else:
+            return None
+        return content_hash(self.template_version, page_version)
@@ -1,25 +1,54 @@
+from collections import defaultdict
 from django.views.generic.base import TemplateView
 from django.views.generic.detail import DetailView
+from django.db.models import F
+from author.models import Manuscript
 from editor.models import JournalIssue
+from editor.issues import issue_queryset, issue_articles
 from django.conf import settings
+from .page_cache import CachedPageMixin
+from .navigation import published_issue_navigation
 
 class PublicContextMixin:
     def get_context_data(self, *args, **kwargs):
         c = super().get_context_data(*args, **kwargs)
-        c['issues'] = JournalIssue.objects.filter(published=True).all()
+        c['issues'] = published_issue_navigation()
         c['editor_names'] = settings.EDITOR_NAMES
         return c
 
-class HomePage(PublicContextMixin, TemplateView):
+class HomePage(CachedPageMixin, PublicContextMixin, TemplateView):
     template_name = "public/home_page.html"
 
-class ShowIssue(PublicContextMixin, DetailView):
+    def page_name(self):
+        return 'home'
+
+    def get_context_data(self, *args, **kwargs):
+        "Lists the manuscripts in each issue, fetched together"
+        c = super().get_context_data(*args, **kwargs)
+        manuscripts = defaultdict(list)
+        for m in (Manuscript.objects.filter(issues__in=[issue.id for issue in c['issues']])
+                .annotate(issue_id=F('issues')).select_related('current_revision')
+                .prefetch_related('authors').order_by('pk')):
+            manuscripts[m.issue_id].append(m)
+        for issue in c['issues']:
+            issue.manuscripts = manuscripts[issue.id]
+        return c
+
+class ShowIssue(CachedPageMixin, PublicContextMixin, DetailView):
     model = JournalIssue
     template_name = "public/issue_detail.html"
     context_object_name = "issue"
 
+    def page_name(self):
+        return 'issue:{}'.format(self.kwargs['pk'])
+
     def get_queryset(self):
-        return JournalIssue.objects.filter(published=True)
+        return issue_queryset(JournalIssue.objects.filter(published=True))
+
+    def get_context_data(self, *args, **kwargs):
+        c = super().get_context_data(*args, **kwargs)
+        c['articles'] = issue_articles(self.object)
+        return c
 
 class AboutPage(TemplateView):
     pass
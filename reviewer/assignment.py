@@ -1,24 +1,198 @@
 from math import log
+from collections import defaultdict
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q, F, Sum
+from django.db.models.functions import Coalesce
+from common.due_date import due_date
+from author.models import Revision
+from .models import Review, ManuscriptReviewer, Interaction
+from .matching import MinCostFlow
+from .workload import record_reviews_created, record_reviews_deleted
+from .interactions import (
+    record_reviewed_authors, 
+    forget_reviewed_authors, 
+    exclude_conflicts, 
+    conflicted_pairs,
+)
+from .email import notify_user_when_review_created
+
+WEIGHTS = {
+    'log_total_reviews': -1,
+    'log_author_reviews': -5,
+}
 
 def ranked_reviewers(authors, existing_reviewers=None):
-    "Returns a list of possible reviewers, sorted by score"
+    """Returns a list of possible reviewers, sorted by score.
+    Both of each candidate's review counts are computed in a single annotated
+    query; candidates with equal scores keep their primary-key order.
+    Authors, and anyone `exclude_conflicts` rules out, are not candidates.
+    """
     author_ids = [author.id for author in authors]
-    candidates = User.objects.filter(profile__is_reviewer=True).exclude(id__in=author_ids)
+    candidates = exclude_conflicts(User.objects.filter(profile__is_reviewer=True), author_ids)
     if existing_reviewers:
         existing_reviewer_ids = [r.id for r in existing_reviewers]
         candidates = candidates.exclude(id__in=existing_reviewer_ids)
-    return sorted(candidates.all(), key=lambda c: reviewer_heuristic(authors, c), reverse=True)
+    candidates = annotate_review_counts(candidates, author_ids).order_by('pk')
+    return sorted(
+        candidates,
+        key=lambda c: reviewer_score(c.total_reviews, c.author_reviews),
+        reverse=True
+    )
+
+def annotate_review_counts(users, author_ids):
+    """Annotates each user with `total_reviews`, read from their workload 
+    counter, and `author_reviews`, the number of reviews they have written of 
+    manuscripts by any of the authors, summed from their interactions. As in 
+    `reviewer_heuristic`, a review of a manuscript by several of the authors 
+    counts once per author.
+    """
+    reviewed_authors = Q(interactions__kind=Interaction.KindChoices.REVIEWED, 
+            interactions__other__in=author_ids)
+    return users.annotate(
+        total_reviews=F('profile__total_reviews'),
+        author_reviews=Coalesce(Sum('interactions__count', filter=reviewed_authors), 0),
+    )
 
 def reviewer_heuristic(authors, potential_reviewer):
     "Returns a score for an (author, reviewer) pair"
+    return reviewer_score(
+        potential_reviewer.reviews.count(),
+        potential_reviewer.reviews.filter(revision__manuscript__authors__in=authors).count(),
+    )
+
+def reviewer_score(total_reviews, author_reviews):
+    "Scores a potential reviewer, preferring those who have reviewed less (and less of these authors)"
     factors = {
-        'log_total_reviews': log(1 + potential_reviewer.reviews.count()),
-        'log_author_reviews': log(1 + potential_reviewer.reviews.filter(
-                revision__manuscript__authors__in=authors).count())
+        'log_total_reviews': log(1 + total_reviews),
+        'log_author_reviews': log(1 + author_reviews),
     }
-    weights = {
-        'log_total_reviews': -1,
-        'log_author_reviews': -5,
-    }
-    return sum([factors[key] * weights[key] for key in factors.keys()])
+    return sum([factors[key] * WEIGHTS[key] for key in factors.keys()])
+
+COST_SCALE = 1000
+
+def plan_batch_assignment(revisions, number_of_reviewers):
+    """Chooses new reviewers for many revisions at once, solving a min-cost
+    flow problem rather than assigning greedily one manuscript at a time.
+    
+    Each revision needs enough reviewers to bring its manuscript up to 
+    `number_of_reviewers`. Authors, those in conflict with them, and existing 
+    reviewers of a manuscript are not eligible to review it. Costs mirror 
+    `reviewer_score`: assigning a reviewer costs log(1 + their review count), 
+    counting the reviews assigned earlier in this batch, so that load is spread 
+    across reviewers; and 5 * log(1 + reviews of these authors), so that 
+    reviewers see new authors. 
+    Revisions should be loaded with `manuscript__authors` and 
+    `manuscript__reviewers` prefetched.
+
+    Returns a dict mapping each revision to a list of new reviewers. Revisions
+    which could not be given enough eligible reviewers get as many as possible.
+    """
+    demand = {}
+    for revision in revisions:
+        needed = number_of_reviewers - len(revision.manuscript.reviewers.all())
+        if needed > 0:
+            demand[revision] = needed
+    if not demand:
+        return {}
+    author_ids = {a.id for rev in demand for a in rev.manuscript.authors.all()}
+    reviewers = list(annotate_review_counts(
+        User.objects.filter(profile__is_reviewer=True), 
+        list(author_ids)
+    ).order_by('pk'))
+    reviews_of_author = defaultdict(int)
+    for reviewer_id, author_id, count in Interaction.objects.filter(
+        kind=Interaction.KindChoices.REVIEWED,
+        other_id__in=author_ids,
+    ).values_list('user_id', 'other_id', 'count'):
+        reviews_of_author[(reviewer_id, author_id)] = count
+    conflicts = conflicted_pairs(author_ids)
+
+    revision_nodes = {rev: i + 2 for i, rev in enumerate(demand)}
+    reviewer_nodes = {r.id: i + 2 + len(demand) for i, r in enumerate(reviewers)}
+    source, sink = 0, 1
+    flow = MinCostFlow(2 + len(demand) + len(reviewers))
+    for revision, needed in demand.items():
+        flow.add_edge(source, revision_nodes[revision], needed, 0)
+    edges = {}
+    for revision in demand:
+        manuscript_author_ids = {a.id for a in revision.manuscript.authors.all()}
+        ineligible = {u for u, a in conflicts if a in manuscript_author_ids}
+        ineligible |= {u.id for u in revision.manuscript.reviewers.all()}
+        for reviewer in reviewers:
+            if reviewer.id in ineligible:
+                continue
+            familiarity = sum(reviews_of_author[(reviewer.id, a.id)] 
+                    for a in revision.manuscript.authors.all())
+            cost = round(COST_SCALE * -WEIGHTS['log_author_reviews'] * log(1 + familiarity))
+            edges[(revision, reviewer)] = flow.add_edge(
+                revision_nodes[revision], 
+                reviewer_nodes[reviewer.id], 
+                1, 
+                cost
+            )
+    for reviewer in reviewers:
+        for j in range(1, len(demand) + 1):
+            cost = round(COST_SCALE * -WEIGHTS['log_total_reviews'] * log(1 + reviewer.total_reviews + j))
+            flow.add_edge(reviewer_nodes[reviewer.id], sink, 1, cost)
+    flow.solve(source, sink)
+    plan = {revision: [] for revision in demand}
+    for (revision, reviewer), edge in edges.items():
+        if flow.flow(edge):
+            plan[revision].append(reviewer)
+    return plan
+
+def batch_assign_reviewers(revisions=None, days=None, number_of_reviewers=None, dry_run=False):
+    """Assigns reviewers to many pending revisions at once, in one transaction.
+    By default, considers every pending revision whose manuscript needs more 
+    reviewers. New reviewers are chosen by `plan_batch_assignment`. Then, as in
+    `RevisionStateMachine.unsubmitted_to_pending`, a review is created for each
+    of the manuscript's reviewers who does not yet have one. Reviewers are 
+    notified once the transaction commits.
+
+    Returns a dict mapping each revision to the list of its new reviewers. 
+    When `dry_run` is set, returns the plan without saving anything.
+    """
+    if number_of_reviewers is None:
+        number_of_reviewers = settings.NUMBER_OF_REVIEWERS
+    if revisions is None:
+        revisions = Revision.objects.filter(status=Revision.StatusChoices.PENDING)
+    with transaction.atomic():
+        revisions = list(
+            revisions.select_for_update()
+            .select_related('manuscript')
+            .prefetch_related('manuscript__authors', 'manuscript__reviewers', 'reviews')
+            .order_by('pk')
+        )
+        plan = plan_batch_assignment(revisions, number_of_reviewers)
+        if dry_run:
+            return plan
+        ManuscriptReviewer.objects.bulk_create([
+            ManuscriptReviewer(manuscript=revision.manuscript, reviewer=reviewer)
+            for revision, reviewers in plan.items() for reviewer in reviewers
+        ])
+        date_due = due_date(days or settings.DAYS_TO_REVIEW)
+        reviews = []
+        for revision in revisions:
+            reviewers = list(revision.manuscript.reviewers.all()) + plan.get(revision, [])
+            has_review = {review.reviewer_id for review in revision.reviews.all()}
+            reviews += [Review(revision=revision, reviewer=reviewer, date_due=date_due)
+                    for reviewer in reviewers if reviewer.id not in has_review]
+        Review.objects.bulk_create(reviews)
+        record_reviews_created(reviews)
+        record_reviewed_authors(reviews)
+        transaction.on_commit(lambda: [notify_user_when_review_created(r) for r in reviews])
+    return plan
+
+def clear_reviewers(manuscripts):
+    """Removes every review and reviewer of the manuscripts, keeping workload
+    counters and interactions up to date. Returns the number of reviews deleted.
+    """
+    with transaction.atomic():
+        reviews = list(Review.objects.filter(revision__manuscript__in=manuscripts))
+        record_reviews_deleted(reviews)
+        forget_reviewed_authors(reviews)
+        Review.objects.filter(pk__in=[r.pk for r in reviews]).delete()
+        ManuscriptReviewer.objects.filter(manuscript__in=manuscripts).delete()
+    return len(reviews)
@@ -0,0 +1,26 @@
+from django.utils import timezone
+from .models import Review
+from .state_machine import ReviewStateMachine
+
+OPEN_STATUSES = [Review.StatusChoices.ASSIGNED, Review.StatusChoices.EDIT_REQUESTED]
+
+def overdue_reviews(now=None):
+    "Open reviews whose due date has passed, found through the (status, date_due) index"
+    return Review.objects.filter(status__in=OPEN_STATUSES, date_due__lt=now or timezone.now())
+
+def sweep_deadlines(now=None, batch_size=500):
+    """Expires overdue reviews, `batch_size` at a time, each batch in its own
+    transaction. Reviews are locked and their status and due date checked 
+    again as each batch is transitioned, so sweeps which overlap, or which 
+    race with an editor's decision, skip reviews which have already moved on. 
+    Returns the number of reviews expired.
+    """
+    now = now or timezone.now()
+    sm = ReviewStateMachine()
+    expired = 0
+    while True:
+        batch = list(overdue_reviews(now).order_by('date_due', 'pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return expired
+        reviews = overdue_reviews(now).filter(pk__in=batch)
+        expired += len(sm.transition_many(reviews, Review.StatusChoices.EXPIRED))
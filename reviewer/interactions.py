@@ -0,0 +1,135 @@
+from collections import Counter, defaultdict
+from itertools import permutations
+from django.conf import settings
+from django.db.models import F, Count
+from author.models import ManuscriptAuthorship
+from .models import Review, Interaction
+
+COAUTHORED = Interaction.KindChoices.COAUTHORED
+REVIEWED = Interaction.KindChoices.REVIEWED
+
+def record_authorships_acknowledged(authorships):
+    """Links each newly-acknowledged author with the manuscript's other
+    acknowledged authors. Authorships should already be saved as acknowledged.
+    """
+    new = {(a.manuscript_id, a.author_id) for a in authorships}
+    acknowledged = defaultdict(set)
+    for manuscript_id, author_id in (ManuscriptAuthorship.objects
+            .filter(manuscript_id__in={m for m, a in new}, acknowledged=True)
+            .values_list('manuscript_id', 'author_id')):
+        acknowledged[manuscript_id].add(author_id)
+    edges = Counter()
+    for manuscript_id, author_id in new:
+        for coauthor_id in acknowledged[manuscript_id] - {author_id}:
+            if (manuscript_id, coauthor_id) in new and coauthor_id < author_id:
+                continue
+            edges[(author_id, coauthor_id, COAUTHORED)] += 1
+            edges[(coauthor_id, author_id, COAUTHORED)] += 1
+    _adjust_interactions(edges)
+
+def record_reviewed_authors(reviews):
+    "Counts new reviews as reviews of each of the manuscript's authors"
+    _adjust_interactions(_reviewed_edges(reviews, 1))
+
+def forget_reviewed_authors(reviews):
+    "Uncounts reviews which are about to be deleted"
+    _adjust_interactions(_reviewed_edges(reviews, -1))
+
+def _reviewed_edges(reviews, sign):
+    reviews = list(reviews)
+    authors = defaultdict(list)
+    for revision_id, author_id in (ManuscriptAuthorship.objects
+            .filter(manuscript__revisions__in={r.revision_id for r in reviews})
+            .values_list('manuscript__revisions', 'author_id')):
+        authors[revision_id].append(author_id)
+    edges = Counter()
+    for review in reviews:
+        for author_id in authors[review.revision_id]:
+            edges[(review.reviewer_id, author_id, REVIEWED)] += sign
+    return edges
+
+def _adjust_interactions(edges):
+    """Adds each change to its edge's count, creating missing edges and
+    deleting those whose count reaches zero. Edges which change by the same
+    amount are updated together.
+    """
+    edges = {edge: n for edge, n in edges.items() if n}
+    if not edges:
+        return
+    existing = {
+        (i.user_id, i.other_id, i.kind): i.pk for i in Interaction.objects.filter(
+            user_id__in={u for u, o, k in edges},
+            other_id__in={o for u, o, k in edges},
+            kind__in={k for u, o, k in edges},
+        ).only('pk', 'user_id', 'other_id', 'kind')
+    }
+    pks_by_change = defaultdict(list)
+    for edge, n in edges.items():
+        if edge in existing:
+            pks_by_change[n].append(existing[edge])
+    for n, pks in pks_by_change.items():
+        Interaction.objects.filter(pk__in=pks).update(count=F('count') + n)
+    Interaction.objects.bulk_create([
+        Interaction(user_id=u, other_id=o, kind=k, count=n)
+        for (u, o, k), n in edges.items() if (u, o, k) not in existing and n > 0
+    ])
+    if any(n < 0 for n in edges.values()):
+        Interaction.objects.filter(pk__in=existing.values(), count__lte=0).delete()
+
+def exclude_conflicts(users, author_ids):
+    """Excludes the authors and, when `REVIEWERS_EXCLUDE_COAUTHORS` is set,
+    anyone who has co-authored with them. `author_ids` may be a list or a 
+    query of ids.
+    """
+    users = users.exclude(id__in=author_ids)
+    if settings.REVIEWERS_EXCLUDE_COAUTHORS:
+        users = users.exclude(id__in=Interaction.objects.filter(
+                kind=COAUTHORED, other_id__in=author_ids).values('user_id'))
+    return users
+
+def conflicted_pairs(author_ids):
+    """Returns the set of (user id, author id) pairs for which the user may not
+    review the author's work, as `exclude_conflicts` would decide.
+    """
+    pairs = {(a, a) for a in author_ids}
+    if settings.REVIEWERS_EXCLUDE_COAUTHORS:
+        pairs |= set(Interaction.objects.filter(kind=COAUTHORED, other_id__in=author_ids)
+                .values_list('user_id', 'other_id'))
+    return pairs
+
+def counted_interactions():
+    """Counts every interaction from scratch.
+    Returns a dict mapping (user id, other id, kind) to counts.
+    """
+    authors = defaultdict(set)
+    for manuscript_id, author_id in (ManuscriptAuthorship.objects.filter(acknowledged=True)
+            .values_list('manuscript_id', 'author_id')):
+        authors[manuscript_id].add(author_id)
+    counted = Counter((u, o, COAUTHORED) for a in authors.values() for u, o in permutations(a, 2))
+    for reviewer_id, author_id, count in (Review.objects.order_by()
+            .filter(revision__manuscript__authors__isnull=False)
+            .values_list('reviewer_id', 'revision__manuscript__authors')
+            .annotate(count=Count('pk'))):
+        counted[(reviewer_id, author_id, REVIEWED)] = count
+    return counted
+
+def interaction_drift():
+    """Compares stored interactions with counted interactions.
+    Returns a list of ((user id, other id, kind), stored, counted) tuples for
+    each edge which has drifted.
+    """
+    counted = counted_interactions()
+    stored = {(i.user_id, i.other_id, i.kind): i.count for i in Interaction.objects.all()}
+    return sorted(
+        (edge, stored.get(edge, 0), counted.get(edge, 0))
+        for edge in set(stored) | set(counted)
+        if stored.get(edge, 0) != counted.get(edge, 0)
+    )
+
+def rebuild_interactions():
+    """Adjusts drifted edges to match counted interactions. Returns the drift found.
+    Changes which run concurrently may be lost; run this when the site is quiet.
+    """
+    drift = interaction_drift()
+    _adjust_interactions({edge: counted - stored for edge, stored, counted in drift})
+    return drift
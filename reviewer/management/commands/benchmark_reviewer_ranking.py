@@ -0,0 +1,101 @@
+import random
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from author.models import Manuscript, ManuscriptAuthorship, Revision
+from reviewer.models import Review
+from reviewer.assignment import ranked_reviewers, reviewer_heuristic
+from reviewer.workload import record_reviews_created
+from reviewer.interactions import record_authorships_acknowledged, record_reviewed_authors
+from roles.models import Profile
+
+class Rollback(Exception):
+    pass
+
+class QueryCounter:
+    "A database execute wrapper which counts queries"
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+class Command(BaseCommand):
+    help = (
+        'Times ranked_reviewers against per-reviewer scoring over synthetic '
+        'reviewer pools. All data is created in a transaction which is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-s', '--sizes', type=int, nargs='+', default=[50, 500, 5000],
+                help="Reviewer pool sizes")
+        parser.add_argument('-r', '--reviews', type=int, default=3, 
+                help="Reviews per reviewer")
+        parser.add_argument('--skip-baseline', action='store_true', 
+                help="Don't time per-reviewer scoring")
+
+    def handle(self, *args, **options):
+        self.stdout.write("{:>8} {:>14} {:>10} {:>14} {:>10}".format(
+            "pool", "ranked (s)", "queries", "baseline (s)", "queries"))
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    authors = self.create_corpus(size, options['reviews'])
+                    self.stdout.write(self.benchmark(size, authors, options['skip_baseline']))
+                    raise Rollback()
+            except Rollback:
+                pass
+
+    def benchmark(self, size, authors, skip_baseline):
+        ranked_queries = QueryCounter()
+        with connection.execute_wrapper(ranked_queries):
+            start = perf_counter()
+            ranked = ranked_reviewers(authors)
+            ranked_time = perf_counter() - start
+        if skip_baseline:
+            return "{:>8} {:>14.3f} {:>10}".format(size, ranked_time, ranked_queries.count)
+        baseline_queries = QueryCounter()
+        with connection.execute_wrapper(baseline_queries):
+            start = perf_counter()
+            candidates = User.objects.filter(profile__is_reviewer=True).exclude(
+                    id__in=[a.id for a in authors])
+            baseline = sorted(candidates.all(), key=lambda c: reviewer_heuristic(authors, c), 
+                    reverse=True)
+            baseline_time = perf_counter() - start
+        if baseline != ranked:
+            self.stderr.write("Rankings differ for pool size {}".format(size))
+        return "{:>8} {:>14.3f} {:>10} {:>14.3f} {:>10}".format(
+                size, ranked_time, ranked_queries.count, baseline_time, baseline_queries.count)
+
+    def create_corpus(self, size, reviews_per_reviewer):
+        "Creates `size` reviewers and enough manuscripts for each to have some reviews"
+        rng = random.Random(size)
+        prefix = "bench{}_".format(size)
+        User.objects.bulk_create([User(username=prefix + str(i)) for i in range(size)])
+        users = list(User.objects.filter(username__startswith=prefix))
+        Profile.objects.bulk_create([Profile(user=u, is_author=True, is_reviewer=True) for u in users])
+        now = timezone.now()
+        num_manuscripts = max(1, size * reviews_per_reviewer // 2)
+        Manuscript.objects.bulk_create([Manuscript() for i in range(num_manuscripts)])
+        manuscripts = list(Manuscript.objects.order_by('-pk')[:num_manuscripts])
+        authorships = ManuscriptAuthorship.objects.bulk_create([
+            ManuscriptAuthorship(manuscript=m, author=author, acknowledged=True)
+            for m in manuscripts for author in rng.sample(users, 2)
+        ])
+        Revision.objects.bulk_create([
+            Revision(manuscript=m, title="Benchmark", text="", revision_number=0, 
+                    date_created=now, status=Revision.StatusChoices.PENDING)
+            for m in manuscripts
+        ])
+        revisions = list(Revision.objects.filter(manuscript__in=manuscripts))
+        reviews = Review.objects.bulk_create([
+            Review(revision=rng.choice(revisions), reviewer=user, date_due=now)
+            for user in users for i in range(reviews_per_reviewer)
+        ])
+        record_authorships_acknowledged(authorships)
+        record_reviews_created(reviews)
+        record_reviewed_authors(reviews)
+        return rng.sample(users, 2)
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from reviewer.interactions import interaction_drift, rebuild_interactions
+
+class Command(BaseCommand):
+    help = (
+        "Recounts co-authorships and reviews of each author and fixes any interactions "
+        "which have drifted, for example after authorships were edited in the admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', 
+                help="Report drift without fixing it; exits with an error if any is found")
+
+    def handle(self, *args, **options):
+        drift = interaction_drift() if options['check'] else rebuild_interactions()
+        usernames = dict(User.objects.values_list('id', 'username'))
+        for (user_id, other_id, kind), stored, counted in drift:
+            self.stdout.write("{} {} {}: was {}, counted {}".format(
+                    usernames[user_id], kind, usernames[other_id], stored, counted))
+        if not drift:
+            self.stdout.write("Interactions are up to date.")
+        elif options['check']:
+            raise CommandError("{} interactions have drifted".format(len(drift)))
+        else:
+            self.stdout.write("Fixed {} interactions.".format(len(drift)))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from reviewer.workload import workload_drift, rebuild_workload_counters
+
+class Command(BaseCommand):
+    help = (
+        "Recounts each reviewer's reviews and resets any workload counters which "
+        "have drifted, for example after reviews were deleted or edited in the admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', 
+                help="Report drift without fixing it; exits with an error if any is found")
+
+    def handle(self, *args, **options):
+        drift = workload_drift() if options['check'] else rebuild_workload_counters()
+        for profile, field, stored, counted in drift:
+            self.stdout.write("{}: {} was {}, counted {}".format(
+                    profile.user.username, field, stored, counted))
+        if not drift:
+            self.stdout.write("Workload counters are up to date.")
+        elif options['check']:
+            raise CommandError("{} workload counters have drifted".format(len(drift)))
+        else:
+            self.stdout.write("Reset {} workload counters.".format(len(drift)))
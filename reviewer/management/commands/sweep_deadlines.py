@@ -0,0 +1,18 @@
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from reviewer.deadlines import sweep_deadlines
+
+class Command(BaseCommand):
+    help = (
+        "Expires assigned and edit-requested reviews which are past their due date. "
+        "Safe to run from cron as often as every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-b', '--batch-size', type=int, default=500, 
+                help="Reviews to expire per transaction")
+
+    def handle(self, *args, **options):
+        start = perf_counter()
+        expired = sweep_deadlines(batch_size=options['batch_size'])
+        self.stdout.write("Expired {} reviews in {:.3f}s".format(expired, perf_counter() - start))
@@ -0,0 +1,72 @@
+from collections import deque
+
+class MinCostFlow:
+    """Solves min-cost flow problems using successive shortest paths.
+    Nodes are integers from 0 to n-1; costs must be integers. This is adequate
+    for a class-sized assignment problem (hundreds of revisions and reviewers);
+    it is not meant for large graphs.
+    """
+    def __init__(self, n):
+        self.graph = [[] for i in range(n)]
+
+    def add_edge(self, u, v, capacity, cost):
+        """Adds an edge and its residual edge. Returns a handle which can be
+        passed to `flow` once the problem is solved.
+        """
+        self.graph[u].append([v, capacity, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return (u, len(self.graph[u]) - 1)
+
+    def flow(self, edge):
+        "Returns the flow along an edge"
+        u, i = edge
+        v, capacity, cost, reverse = self.graph[u][i]
+        return self.graph[v][reverse][1]
+
+    def solve(self, source, sink):
+        """Pushes as much flow as possible from source to sink at minimum cost.
+        Returns (flow, cost).
+        """
+        total_flow, total_cost = 0, 0
+        while True:
+            distance, previous = self.shortest_paths(source)
+            if distance[sink] is None:
+                return total_flow, total_cost
+            bottleneck = None
+            v = sink
+            while v != source:
+                u, i = previous[v]
+                capacity = self.graph[u][i][1]
+                bottleneck = capacity if bottleneck is None else min(bottleneck, capacity)
+                v = u
+            v = sink
+            while v != source:
+                u, i = previous[v]
+                edge = self.graph[u][i]
+                edge[1] -= bottleneck
+                self.graph[v][edge[3]][1] += bottleneck
+                v = u
+            total_flow += bottleneck
+            total_cost += bottleneck * distance[sink]
+
+    def shortest_paths(self, source):
+        """Finds cheapest paths from source through edges with remaining
+        capacity. Residual edges have negative costs, so this uses the
+        queue-based Bellman-Ford algorithm rather than Dijkstra's.
+        """
+        distance = [None] * len(self.graph)
+        previous = [None] * len(self.graph)
+        queued = [False] * len(self.graph)
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            queued[u] = False
+            for i, (v, capacity, cost, reverse) in enumerate(self.graph[u]):
+                if capacity > 0 and (distance[v] is None or distance[u] + cost < distance[v]):
+                    distance[v] = distance[u] + cost
+                    previous[v] = (u, i)
+                    if not queued[v]:
+                        queued[v] = True
+                        queue.append(v)
+        return distance, previous
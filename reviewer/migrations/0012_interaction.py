@@ -0,0 +1,30 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviewer', '0011_alter_review_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Interaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('COAUTHORED', 'Co-authored with'), ('REVIEWED', 'Reviewed work by')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interactions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='interaction',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'other'), name='unique_interaction'),
+        ),
+    ]
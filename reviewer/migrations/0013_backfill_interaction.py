@@ -0,0 +1,37 @@
+from collections import Counter, defaultdict
+from itertools import permutations
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_interactions(apps, schema_editor):
+    "Counts co-authorships between acknowledged authors and reviews of each author."
+    Interaction = apps.get_model('reviewer', 'Interaction')
+    Review = apps.get_model('reviewer', 'Review')
+    ManuscriptAuthorship = apps.get_model('author', 'ManuscriptAuthorship')
+    authors = defaultdict(set)
+    for manuscript_id, author_id in (ManuscriptAuthorship.objects.filter(acknowledged=True)
+            .values_list('manuscript_id', 'author_id')):
+        authors[manuscript_id].add(author_id)
+    coauthored = Counter(pair for a in authors.values() for pair in permutations(a, 2))
+    interactions = [Interaction(user_id=u, other_id=o, kind='COAUTHORED', count=n) 
+            for (u, o), n in coauthored.items()]
+    reviewed = (Review.objects.order_by()
+            .filter(revision__manuscript__authors__isnull=False)
+            .values_list('reviewer_id', 'revision__manuscript__authors')
+            .annotate(count=Count('pk')))
+    interactions += [Interaction(user_id=u, other_id=o, kind='REVIEWED', count=n) 
+            for u, o, n in reviewed]
+    Interaction.objects.bulk_create(interactions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviewer', '0012_interaction'),
+        ('author', '0009_backfill_manuscript_current_revision'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_interactions, migrations.RunPython.noop),
+    ]
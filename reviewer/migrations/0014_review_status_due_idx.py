@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviewer', '0013_backfill_interaction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['status', 'date_due'], name='review_status_due_idx'),
+        ),
+    ]
@@ -49,15 +49,25 @@ class ReviewerMixin:
         return c
 
 class RevisionReviewMixin:
+    """Looks up the current user's review of the revision. The review is looked
+    up once per request and cached on the view; call `invalidate_review` after
+    changing its state.
+    """
     def get_review(self):
-        try:
-            return Review.objects.get(
-                revision__manuscript_id=self.kwargs['manuscript_pk'],
-                revision__revision_number=self.kwargs['revision_number'],
-                reviewer=self.request.user,
-            )
-        except Review.DoesNotExist:
-            raise Http404()
+        if getattr(self, '_review', None) is None:
+            try:
+                self._review = Review.objects.select_related('revision', 'reviewer').get(
+                    revision__manuscript_id=self.kwargs['manuscript_pk'],
+                    revision__revision_number=self.kwargs['revision_number'],
+                    reviewer=self.request.user,
+                )
+            except Review.DoesNotExist:
+                raise Http404()
+        return self._review
+
+    def invalidate_review(self):
+        "Discards the cached review."
+        self._review = None
 
     def get_context_data(self, *args, **kwargs):
         c = super().get_context_data(*args, **kwargs)
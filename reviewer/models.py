@@ -2,8 +2,16 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.urls import reverse
 from enum import Enum, auto
+from common.models import KanbanQuerySetMixin
+
+class ReviewQuerySet(KanbanQuerySetMixin, models.QuerySet):
+    def get_kanban_assignment(self):
+        return Review.KANBAN_ASSIGNMENT
 
 class ReviewManager(models.Manager):
+    def get_queryset(self):
+        return ReviewQuerySet(self.model, using=self._db)
+
     def for_manuscript(self, manuscript):
         return self.get_queryset().filter(revision__manuscript=manuscript)
 
@@ -35,6 +43,11 @@ class Review(models.Model):
 
     objects = ReviewManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date_due'], name='review_status_due_idx'),
+        ]
+
     def __str__(self):
         return 'Review of "{}" v{} assigned to {} ({})'.format(
             self.revision.title,
@@ -86,10 +99,28 @@ class Review(models.Model):
     def kanban_column(self):
         return self.KANBAN_ASSIGNMENT[self.status]
 
-    @classmethod
-    def in_kanban_columns(self, reviews):
-        return {col: [r for r in reviews if r.kanban_column() == col] for col in self.KanbanColumns}
-
 class ManuscriptReviewer(models.Model):
     manuscript = models.ForeignKey('author.Manuscript', on_delete=models.CASCADE)
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE)
+
+class Interaction(models.Model):
+    """An edge in the graph of how users have worked together: `user` has 
+    co-authored with, or reviewed work by, `other`, `count` times. 
+    Maintained by reviewer.interactions.
+    """
+    class KindChoices(models.TextChoices):
+        COAUTHORED = 'COAUTHORED', 'Co-authored with'
+        REVIEWED = 'REVIEWED', 'Reviewed work by'
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interactions')
+    other = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KindChoices.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind', 'other'], name='unique_interaction'),
+        ]
+
+    def __str__(self):
+        return '{} {} {} ({})'.format(self.user.username, self.get_kind_display().lower(), 
+                self.other.username, self.count)
@@ -3,102 +3,116 @@ from common.due_date import due_date
 from django.contrib import messages
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
 from datetime import datetime, timedelta
 import logging
 from .models import Review
-
-logger = logging.getLogger("cognitive_apprenticeship.analytics")
+from .workload import record_review_transition, record_review_transitions
 
 class ReviewStateMachine(StateMachine):
     """Handles Revision state transitions and their side effects.
     """
     states = Review.StatusChoices
+    state_field = 'status'
+    model_name = 'Review'
 
     def get_state(self, rev):
         return rev.status
 
+    def transition_fields(self, old_state, new_state):
+        "Timestamps and due dates set by each transition"
+        if new_state == self.states.SUBMITTED:
+            return {'date_submitted': timezone.now()}
+        elif new_state in (self.states.WITHDRAWN, self.states.NOT_NEEDED):
+            return {'date_closed': timezone.now()}
+        elif new_state == self.states.EXPIRED and old_state == self.states.ASSIGNED:
+            return {'date_closed': timezone.now()}
+        elif new_state == self.states.EDIT_REQUESTED:
+            return {'date_due': due_date(settings.DAYS_TO_EDIT_REVIEW)}
+        elif new_state == self.states.ASSIGNED:
+            return {'date_due': due_date(settings.DAYS_ON_EXTENSION), 'date_closed': None}
+        return {}
+
     def assigned_to_submitted(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "Your review was submitted. Awaiting an editor decision."
         self.flash_authors(rev, msg, level=messages.SUCCESS)
-        rev.status = new_state
-        rev.date_submitted = timezone.now()
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def assigned_to_expired(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "Your assigned review expired. You may contact the editor to request an extension."
         self.flash_authors(rev, msg, level=messages.WARNING)
-        rev.status = new_state
-        rev.date_closed = timezone.now()
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def assigned_to_withdrawn(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "The manuscript you were assigned to review was withdrawn by its author."
         self.flash_authors(rev, msg)
-        rev.status = new_state
-        rev.date_closed = timezone.now()
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def assigned_to_not_needed(self, rev, old_state, new_state):
-        print("  > executing assigned_to_not_needed")
         self.log_state_transition(rev, old_state, new_state)
         msg = "The editor made a decision on this manuscript before your review was submitted"
         self.flash_authors(rev, msg)
-        rev.status = new_state
-        rev.date_closed = timezone.now()
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def submitted_to_complete(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "A manuscript you reviewed received an editorial decision."
         self.flash_authors(rev, msg)
-        rev.status = new_state
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def submitted_to_edit_requested(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "The editor requested that you edit your review."
-        self.flash_authors(rev, msg.format(rev.title))
-        rev.status = new_state
-        rev.date_due = due_date(settings.DAYS_TO_EDIT_REVIEW)
-        rev.save()
+        self.flash_authors(rev, msg)
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def expired_to_assigned(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "The editor extended the deadline for an expired review."
         self.flash_authors(rev, msg)
-        rev.status = new_state
-        rev.date_due = due_date(settings.DAYS_ON_EXTENSION) 
-        rev.date_complete = None
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def edit_requested_to_submitted(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "You resubmitted your review."
         self.flash_authors(rev, msg, level=messages.SUCCESS)
-        rev.status = new_state
-        rev.date_submitted = timezone.now()
-        rev.save()
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
+
+    def edit_requested_to_not_needed(self, rev, old_state, new_state):
+        self.log_state_transition(rev, old_state, new_state)
+        msg = "The editor made a decision on this manuscript before your edited review was submitted"
+        self.flash_authors(rev, msg)
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
 
     def edit_requested_to_expired(self, rev, old_state, new_state):
         self.log_state_transition(rev, old_state, new_state)
         msg = "A review with edits requested has passed its deadline."
         self.flash_authors(rev, msg, level=messages.WARNING)
-        rev.status = new_state
-        rev.save()
-
-    def log_state_transition(self, rev, old_state, new_state):
-        msg = "Review {} transitioned from {} to {}".format(rev.id, old_state, new_state)
-        logger.info(msg, extra={
-            'event': 'state_transition',
-            'old_state': old_state,
-            'new_state': new_state,
-            'model': 'Review',
-            'user': self.request.user.username if self.request else None,
-            'id': rev.id,
-        })
+        self.set_state(rev, old_state, new_state)
+        self.save(rev, old_state, new_state)
+
+    def save(self, rev, old_state, new_state):
+        "Saves the review and moves it between its reviewer's workload counters"
+        with transaction.atomic():
+            rev.save()
+            record_review_transition(rev, old_state, new_state)
+
+    def bulk_side_effects(self, reviews, old_state, new_state):
+        "Moves the reviews between their reviewers' workload counters"
+        record_review_transitions(reviews, old_state, new_state)
+        super().bulk_side_effects(reviews, old_state, new_state)
 
     def flash_authors(self, rev, message, level=messages.INFO):
         "Sets a flash message if the current user is the reviewer"
@@ -120,8 +134,9 @@ class ReviewStateMachine(StateMachine):
             states.ASSIGNED: expired_to_assigned,
         },
         states.EDIT_REQUESTED: {
-            states.SUBMITTED,
-            states.EXPIRED,
+            states.SUBMITTED: edit_requested_to_submitted,
+            states.EXPIRED: edit_requested_to_expired,
+            states.NOT_NEEDED: edit_requested_to_not_needed,
         },
     }
 
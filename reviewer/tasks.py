@@ -0,0 +1,10 @@
+"""Side effects of review transitions, run from the outbox by `drain_outbox`.
+"""
+from .models import Review
+from .email import notify_user_when_review_created
+
+def notify_reviewer(review_id):
+    "Emails the reviewer about a new review, unless it has since been deleted"
+    review = Review.objects.select_related('reviewer__profile').filter(pk=review_id).first()
+    if review:
+        notify_user_when_review_created(review)
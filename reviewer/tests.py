@@ -1,3 +1,242 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from collections import Counter
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from author.models import Revision, ManuscriptAuthorship
+from common.models import TransitionEvent
+from reviewer.models import Review, Interaction
+from reviewer.assignment import ranked_reviewers, reviewer_heuristic, batch_assign_reviewers
+from reviewer.matching import MinCostFlow
+from reviewer.state_machine import ReviewStateMachine
+from reviewer.workload import workload_drift, rebuild_workload_counters
+from reviewer.deadlines import sweep_deadlines
+from reviewer.interactions import interaction_drift, rebuild_interactions
+from editor.forms import AssignReviewerForm
+from editor.tests import make_user, make_manuscript
 
-# Create your tests here.
+class DetailViewQueriesTest(TestCase):
+    """Each detail view should look up the revision and review once and cost a 
+    fixed number of queries"""
+    expected_queries = {
+        'reviewer:show_revision': 6,
+        'reviewer:show_review': 6,
+        'reviewer:review_instructions': 6,
+        'reviewer:edit_review': 6,
+    }
+
+    def test_query_counts(self):
+        author = make_user("author", is_author=True)
+        reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(3)]
+        m = make_manuscript([author], Revision.StatusChoices.PENDING, reviewers)
+        Review.objects.update(text="<p>Review</p>", recommendation=Review.RecommendationChoices.ACCEPT)
+        self.client.force_login(reviewers[0])
+        for name, expected in self.expected_queries.items():
+            with self.subTest(name), self.assertNumQueries(expected):
+                response = self.client.get(reverse(name, args=(m.id, 0)))
+                self.assertEqual(response.status_code, 200)
+
+    def test_submit_review(self):
+        author = make_user("author", is_author=True)
+        reviewer = make_user("reviewer", is_reviewer=True)
+        m = make_manuscript([author], Revision.StatusChoices.PENDING, [reviewer])
+        self.client.force_login(reviewer)
+        url = reverse('reviewer:show_review', args=(m.id, 0))
+        response = self.client.post(url, {'action': 'Submit'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(Review.objects.get().status, Review.StatusChoices.SUBMITTED)
+
+class RankedReviewersTest(TestCase):
+    def setUp(self):
+        rng = random.Random(615)
+        self.authors = [make_user("author{}".format(i), is_author=True) for i in range(6)]
+        self.reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(12)]
+        for i in range(30):
+            make_manuscript(
+                rng.sample(self.authors, rng.randint(1, 3)), 
+                Revision.StatusChoices.PENDING, 
+                rng.sample(self.reviewers, rng.randint(0, 4))
+            )
+
+    def test_ranking_matches_heuristic(self):
+        "Ranking should match sorting candidates by reviewer_heuristic"
+        for i in range(len(self.authors) - 1):
+            authors = self.authors[i:i + 2]
+            candidates = User.objects.filter(profile__is_reviewer=True)
+            expected = sorted(candidates, key=lambda c: reviewer_heuristic(authors, c), reverse=True)
+            self.assertEqual(ranked_reviewers(authors), expected)
+
+    def test_ranking_uses_one_query(self):
+        with self.assertNumQueries(1):
+            ranked_reviewers(self.authors[:2], self.reviewers[:2])
+
+@override_settings(NUMBER_OF_REVIEWERS=2)
+class BatchAssignReviewersTest(TestCase):
+    def setUp(self):
+        self.users = [make_user("user{}".format(i), is_author=True, is_reviewer=True) for i in range(8)]
+
+    def test_assigns_every_pending_revision(self):
+        manuscripts = [make_manuscript(self.users[i:i + 2]) for i in range(6)]
+        make_manuscript(self.users[:1], Revision.StatusChoices.UNSUBMITTED)
+        with self.assertNumQueries(15):
+            plan = batch_assign_reviewers()
+        self.assertEqual(len(plan), 6)
+        for m in manuscripts:
+            reviewers = set(m.reviewers.all())
+            self.assertEqual(len(reviewers), 2)
+            self.assertFalse(reviewers & set(m.authors.all()))
+            self.assertEqual({r.reviewer for r in m.current_revision.reviews.all()}, reviewers)
+        load = Counter(Review.objects.values_list('reviewer', flat=True))
+        self.assertLessEqual(max(load.values()) - min(load.values()), 1)
+        self.assertEqual(workload_drift(), [])
+        self.assertEqual(batch_assign_reviewers(), {})
+
+    def test_prefers_reviewers_unfamiliar_with_authors(self):
+        old = make_manuscript(self.users[:1], Revision.StatusChoices.ACCEPT, self.users[1:3])
+        m = make_manuscript(self.users[:1])
+        plan = batch_assign_reviewers()
+        self.assertFalse(set(plan[m.current_revision]) & set(self.users[1:3]))
+
+    def test_dry_run_saves_nothing(self):
+        make_manuscript(self.users[:1])
+        plan = batch_assign_reviewers(dry_run=True)
+        self.assertEqual(sum(len(r) for r in plan.values()), 2)
+        self.assertFalse(Review.objects.exists())
+
+class WorkloadCountersTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+        self.reviewer = make_user("reviewer", is_reviewer=True)
+        self.sm = ReviewStateMachine()
+
+    def counters(self):
+        self.reviewer.profile.refresh_from_db()
+        p = self.reviewer.profile
+        return (p.active_reviews, p.submitted_reviews, p.completed_reviews, p.expired_reviews, p.total_reviews)
+
+    def test_transitions_update_counters(self):
+        make_manuscript([self.author], reviewers=[self.reviewer])
+        make_manuscript([self.author], reviewers=[self.reviewer])
+        first, second = Review.objects.order_by('pk')
+        self.assertEqual(self.counters(), (2, 0, 0, 0, 2))
+        self.sm.transition(first, Review.StatusChoices.SUBMITTED)
+        self.sm.transition(second, Review.StatusChoices.EXPIRED)
+        self.assertEqual(self.counters(), (0, 1, 0, 1, 2))
+        self.sm.transition(first, Review.StatusChoices.EDIT_REQUESTED)
+        self.sm.transition(second, Review.StatusChoices.ASSIGNED)
+        self.assertEqual(self.counters(), (2, 0, 0, 0, 2))
+        self.sm.transition(first, Review.StatusChoices.SUBMITTED)
+        self.sm.transition(first, Review.StatusChoices.COMPLETE)
+        self.sm.transition(second, Review.StatusChoices.NOT_NEEDED)
+        self.assertEqual(self.counters(), (0, 0, 1, 0, 2))
+        self.assertEqual(workload_drift(), [])
+
+    def test_rebuild_fixes_drift(self):
+        make_manuscript([self.author], reviewers=[self.reviewer])
+        Review.objects.update(status=Review.StatusChoices.SUBMITTED)
+        drift = workload_drift()
+        self.assertEqual({(field, stored, counted) for profile, field, stored, counted in drift}, 
+                {('active_reviews', 1, 0), ('submitted_reviews', 0, 1)})
+        self.assertEqual(len(rebuild_workload_counters()), 2)
+        self.assertEqual(self.counters(), (0, 1, 0, 0, 1))
+        self.assertEqual(workload_drift(), [])
+
+class InteractionsTest(TestCase):
+    def setUp(self):
+        self.authors = [make_user("author{}".format(i), is_author=True, is_reviewer=True) for i in range(3)]
+        self.reviewer = make_user("reviewer", is_reviewer=True)
+
+    def test_records_coauthors_and_reviews(self):
+        make_manuscript(self.authors[:2], reviewers=[self.reviewer])
+        make_manuscript(self.authors, reviewers=[self.reviewer])
+        edges = {(i.user_id, i.other_id, i.kind): i.count for i in Interaction.objects.all()}
+        a, b, c = [u.id for u in self.authors]
+        self.assertEqual(edges[(a, b, Interaction.KindChoices.COAUTHORED)], 2)
+        self.assertEqual(edges[(c, a, Interaction.KindChoices.COAUTHORED)], 1)
+        self.assertEqual(edges[(self.reviewer.id, a, Interaction.KindChoices.REVIEWED)], 2)
+        self.assertEqual(edges[(self.reviewer.id, c, Interaction.KindChoices.REVIEWED)], 1)
+        self.assertEqual(interaction_drift(), [])
+
+    def test_acknowledgement_adds_coauthors(self):
+        m = make_manuscript(self.authors[:1], Revision.StatusChoices.WAITING_FOR_AUTHORS)
+        ManuscriptAuthorship.objects.create(manuscript=m, author=self.authors[1])
+        self.assertFalse(Interaction.objects.exists())
+        self.client.force_login(self.authors[1])
+        url = reverse('author:show_revision', args=(m.id, 0))
+        self.client.post(url, {'action': 'Acknowledge authorship'})
+        self.assertEqual(Interaction.objects.filter(kind=Interaction.KindChoices.COAUTHORED).count(), 2)
+        self.assertEqual(interaction_drift(), [])
+
+    def test_rebuild_fixes_drift(self):
+        make_manuscript(self.authors[:2], reviewers=[self.reviewer])
+        Interaction.objects.filter(kind=Interaction.KindChoices.REVIEWED).delete()
+        self.assertEqual(len(interaction_drift()), 2)
+        self.assertEqual(len(rebuild_interactions()), 2)
+        self.assertEqual(interaction_drift(), [])
+
+    @override_settings(REVIEWERS_EXCLUDE_COAUTHORS=True)
+    def test_coauthors_are_not_eligible(self):
+        make_manuscript(self.authors[:2])
+        m = make_manuscript(self.authors[:1])
+        self.assertEqual(ranked_reviewers(self.authors[:1]), [self.authors[2], self.reviewer])
+        form = AssignReviewerForm(m)
+        self.assertEqual(set(form.possible_reviewers), {self.authors[2], self.reviewer})
+        plan = batch_assign_reviewers(number_of_reviewers=2)
+        self.assertEqual(set(plan[m.current_revision]), {self.authors[2], self.reviewer})
+
+class TransitionManyTest(TestCase):
+    def setUp(self):
+        self.author = make_user("author", is_author=True)
+        self.reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(3)]
+        make_manuscript([self.author], reviewers=self.reviewers)
+        self.sm = ReviewStateMachine()
+
+    def test_transitions_in_one_update_per_group(self):
+        with self.assertNumQueries(6):
+            reviews = self.sm.transition_many(Review.objects.all(), Review.StatusChoices.SUBMITTED)
+        self.assertTrue(all(r.date_submitted for r in reviews))
+        self.assertEqual(Review.objects.filter(status=Review.StatusChoices.SUBMITTED).count(), 3)
+        self.assertEqual(TransitionEvent.objects.filter(model='Review', new_state='SUBMITTED').count(), 3)
+        self.assertEqual(workload_drift(), [])
+
+    def test_illegal_group_changes_nothing(self):
+        first = Review.objects.order_by('pk').first()
+        self.sm.transition(first, Review.StatusChoices.SUBMITTED)
+        with self.assertRaises(ReviewStateMachine.IllegalTransition):
+            self.sm.transition_many(Review.objects.all(), Review.StatusChoices.EXPIRED)
+        self.assertFalse(Review.objects.filter(status=Review.StatusChoices.EXPIRED).exists())
+
+class SweepDeadlinesTest(TestCase):
+    def test_expires_overdue_open_reviews(self):
+        author = make_user("author", is_author=True)
+        reviewers = [make_user("reviewer{}".format(i), is_reviewer=True) for i in range(4)]
+        make_manuscript([author], reviewers=reviewers)
+        past, future = timezone.now() - timedelta(hours=1), timezone.now() + timedelta(hours=1)
+        reviews = list(Review.objects.order_by('pk'))
+        for review, status, date_due in zip(reviews, ['ASSIGNED', 'EDIT_REQUESTED', 'ASSIGNED', 'SUBMITTED'], 
+                [past, past, future, past]):
+            review.status = status
+            review.date_due = date_due
+        Review.objects.bulk_update(reviews, ['status', 'date_due'])
+        rebuild_workload_counters()
+        self.assertEqual(sweep_deadlines(batch_size=1), 2)
+        self.assertEqual(sweep_deadlines(), 0)
+        statuses = list(Review.objects.order_by('pk').values_list('status', flat=True))
+        self.assertEqual(statuses, ['EXPIRED', 'EXPIRED', 'ASSIGNED', 'SUBMITTED'])
+        self.assertEqual(workload_drift(), [])
+
+class MinCostFlowTest(TestCase):
+    def test_assignment(self):
+        "Two workers, two jobs: the cheapest perfect matching costs 1 + 2"
+        costs = [[4, 1], [2, 5]]
+        flow = MinCostFlow(6)
+        edges = {}
+        for i in range(2):
+            flow.add_edge(0, 2 + i, 1, 0)
+            flow.add_edge(4 + i, 1, 1, 0)
+            for j in range(2):
+                edges[(i, j)] = flow.add_edge(2 + i, 4 + j, 1, costs[i][j])
+        self.assertEqual(flow.solve(0, 1), (2, 3))
+        self.assertEqual({k for k, e in edges.items() if flow.flow(e)}, {(0, 1), (1, 0)})
@@ -13,15 +13,15 @@ from .models import Review
 from .mixins import ReviewerMixin, RevisionReviewMixin
 from .forms import EditReviewForm
 from .state_machine import ReviewStateMachine
+from common.kanban import paginate_kanban_columns
 
 class ReviewerHome(ReviewerMixin, TemplateView):
     template_name = "reviewer/home.html"
 
     def get_context_data(self):
         c = super().get_context_data()
-        my_reviews = Review.objects.filter(reviewer=self.request.user).all()
-        for col, reviews in Review.in_kanban_columns(my_reviews).items():
-            c[col.name] = reviews
+        my_reviews = Review.objects.filter(reviewer=self.request.user).select_related('revision')
+        c.update(paginate_kanban_columns(my_reviews, Review.KanbanColumns, self.request))
         return c
 
 class ShowManuscript(ReviewerMixin, DetailView):
@@ -30,11 +30,11 @@ class ShowManuscript(ReviewerMixin, DetailView):
     model = Manuscript
 
     def get_queryset(self):
-        return Manuscript.objects.filter(reviewers=self.request.user)
+        return Manuscript.objects.filter(reviewers=self.request.user).select_related('current_revision')
 
     def get(self, request, *args, **kwargs):
         m = self.get_object()
-        return redirect('reviewer:show_revision', m.id, m.revisions.last().revision_number)
+        return redirect('reviewer:show_revision', m.id, m.current_revision.revision_number)
 
 class ShowRevision(ReviewerMixin, ManuscriptRevisionMixin, RevisionReviewMixin, DetailView):
     """Implements the main tab for a revision.
@@ -66,6 +66,7 @@ class ShowReview(ReviewerMixin, ManuscriptRevisionMixin, RevisionReviewMixin, De
         if action == "SUBMIT":
             try:
                 sm.transition(review, sm.states.SUBMITTED)
+                self.invalidate_review()
             except sm.IllegalTransition:
                 return self.forbid_action("submit")
         else:
@@ -94,15 +95,6 @@ class EditReview(ReviewerMixin, ManuscriptRevisionMixin, RevisionReviewMixin, Up
             raise Http404()
         return self.get_review()
 
-    def get_revision(self):
-        try:
-            return self.get_queryset().get(
-                manuscript__id=self.kwargs['manuscript_pk'],
-                revision_number=self.kwargs['revision_number']
-            )
-        except Revision.DoesNotExist:
-            raise Http404("No such revision")
-
     def get_success_url(self):
         revision = self.get_revision()
         return reverse('reviewer:show_review', args=(revision.manuscript_id, revision.revision_number))
@@ -0,0 +1,113 @@
+from collections import Counter, defaultdict
+from django.db.models import F, Q, Count
+from roles.models import Profile
+from .models import Review
+
+WORKLOAD_COUNTERS = {
+    Review.StatusChoices.ASSIGNED:          'active_reviews',
+    Review.StatusChoices.EDIT_REQUESTED:    'active_reviews',
+    Review.StatusChoices.SUBMITTED:         'submitted_reviews',
+    Review.StatusChoices.COMPLETE:          'completed_reviews',
+    Review.StatusChoices.EXPIRED:           'expired_reviews',
+}
+WORKLOAD_FIELDS = ['active_reviews', 'submitted_reviews', 'completed_reviews',
+        'expired_reviews', 'total_reviews']
+
+def record_review_transition(review, old_state, new_state):
+    """Moves a review between its reviewer's counters.
+    This should run in the same transaction which saves the review's new status.
+    """
+    old_field = WORKLOAD_COUNTERS.get(old_state)
+    new_field = WORKLOAD_COUNTERS.get(new_state)
+    if old_field == new_field:
+        return
+    updates = {}
+    if old_field:
+        updates[old_field] = F(old_field) - 1
+    if new_field:
+        updates[new_field] = F(new_field) + 1
+    Profile.objects.filter(user_id=review.reviewer_id).update(**updates)
+
+def record_review_transitions(reviews, old_state, new_state):
+    """Moves many reviews, all in the same old state, between their reviewers' 
+    counters. Reviewers whose counters change by the same amount are updated 
+    together.
+    """
+    old_field = WORKLOAD_COUNTERS.get(old_state)
+    new_field = WORKLOAD_COUNTERS.get(new_state)
+    if old_field == new_field:
+        return
+    reviewers_by_change = defaultdict(list)
+    for reviewer_id, n in Counter(review.reviewer_id for review in reviews).items():
+        reviewers_by_change[n].append(reviewer_id)
+    for n, reviewer_ids in reviewers_by_change.items():
+        updates = {}
+        if old_field:
+            updates[old_field] = F(old_field) - n
+        if new_field:
+            updates[new_field] = F(new_field) + n
+        Profile.objects.filter(user_id__in=reviewer_ids).update(**updates)
+
+def record_reviews_created(reviews):
+    "Counts new reviews"
+    _adjust_workloads(reviews, 1)
+
+def record_reviews_deleted(reviews):
+    "Uncounts reviews which are about to be deleted"
+    _adjust_workloads(reviews, -1)
+
+def _adjust_workloads(reviews, sign):
+    """Reviewers whose counters change by the same amounts are updated together,
+    so a batch of reviews spread evenly across reviewers costs few queries.
+    """
+    changes = defaultdict(Counter)
+    for review in reviews:
+        changes[review.reviewer_id]['total_reviews'] += sign
+        field = WORKLOAD_COUNTERS.get(review.status)
+        if field:
+            changes[review.reviewer_id][field] += sign
+    reviewers_by_change = defaultdict(list)
+    for reviewer_id, counts in changes.items():
+        reviewers_by_change[tuple(sorted(counts.items()))].append(reviewer_id)
+    for change, reviewer_ids in reviewers_by_change.items():
+        updates = {field: F(field) + n for field, n in change if n}
+        Profile.objects.filter(user_id__in=reviewer_ids).update(**updates)
+
+def counted_workloads():
+    """Counts every reviewer's reviews from scratch, with one grouped query.
+    Returns a dict mapping user ids to dicts of counter values.
+    """
+    statuses = defaultdict(list)
+    for status, field in WORKLOAD_COUNTERS.items():
+        statuses[field].append(status)
+    aggregates = {field: Count('pk', filter=Q(status__in=s)) for field, s in statuses.items()}
+    aggregates['total_reviews'] = Count('pk')
+    rows = Review.objects.order_by().values('reviewer_id').annotate(**aggregates)
+    return {row.pop('reviewer_id'): row for row in rows}
+
+def workload_drift():
+    """Compares stored counters with counts of reviews.
+    Returns a list of (profile, field, stored, counted) tuples for each counter
+    which has drifted.
+    """
+    counted = counted_workloads()
+    drift = []
+    for profile in Profile.objects.select_related('user').order_by('pk'):
+        counts = counted.get(profile.user_id, {})
+        for field in WORKLOAD_FIELDS:
+            stored = getattr(profile, field)
+            if stored != counts.get(field, 0):
+                drift.append((profile, field, stored, counts.get(field, 0)))
+    return drift
+
+def rebuild_workload_counters():
+    """Resets drifted counters to counts of reviews. Returns the drift found.
+    Transitions which run concurrently may be lost; run this when the site is quiet.
+    """
+    drift = workload_drift()
+    profiles = set()
+    for profile, field, stored, counted in drift:
+        setattr(profile, field, counted)
+        profiles.add(profile)
+    Profile.objects.bulk_update(profiles, WORKLOAD_FIELDS)
+    return drift
@@ -6,6 +6,8 @@ from roles.models import Profile
 class ProfileForm(forms.Form):
     first_name = forms.CharField(min_length=1)
     last_name = forms.CharField(min_length=1)
+    immediate_notifications = forms.BooleanField(required=False,
+            label="Email each notification right away instead of in a digest")
 
     def __init__(self, data, user):
         super().__init__(data)
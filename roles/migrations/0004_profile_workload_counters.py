@@ -0,0 +1,38 @@
+# Generated by Django 3.2.6 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roles', '0003_auto_20210914_1701'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='active_reviews',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='completed_reviews',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='expired_reviews',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='submitted_reviews',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='total_reviews',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+WORKLOAD_STATUSES = {
+    'active_reviews': ['ASSIGNED', 'EDIT_REQUESTED'],
+    'submitted_reviews': ['SUBMITTED'],
+    'completed_reviews': ['COMPLETE'],
+    'expired_reviews': ['EXPIRED'],
+}
+
+
+def backfill_workload_counters(apps, schema_editor):
+    "Counts each reviewer's reviews by status."
+    Profile = apps.get_model('roles', 'Profile')
+    Review = apps.get_model('reviewer', 'Review')
+    aggregates = {field: Count('pk', filter=Q(status__in=statuses))
+            for field, statuses in WORKLOAD_STATUSES.items()}
+    aggregates['total_reviews'] = Count('pk')
+    for row in Review.objects.order_by().values('reviewer_id').annotate(**aggregates):
+        Profile.objects.filter(user_id=row.pop('reviewer_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roles', '0004_profile_workload_counters'),
+        ('reviewer', '0011_alter_review_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_workload_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roles', '0005_backfill_profile_workload_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='immediate_notifications',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -7,6 +7,13 @@ class Profile(models.Model):
     is_reviewer = models.BooleanField(default=False)
     is_editor = models.BooleanField(default=False)
     needs_teacher_review = models.BooleanField(default=True)
+    immediate_notifications = models.BooleanField(default=False)
+    # Reviewer workload counters, maintained by reviewer.workload
+    active_reviews = models.IntegerField(default=0)
+    submitted_reviews = models.IntegerField(default=0)
+    completed_reviews = models.IntegerField(default=0)
+    expired_reviews = models.IntegerField(default=0)
+    total_reviews = models.IntegerField(default=0)
 
     def __str__(self):
         return "Profile for " + self.user.username
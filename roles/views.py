@@ -31,6 +31,7 @@ class EditProfile(LoginRequiredMixin, UpdateView):
         form = ProfileForm({
             'first_name': profile.user.first_name,
             'last_name': profile.user.last_name,
+            'immediate_notifications': profile.immediate_notifications,
         }, profile.user)
         context = {
             'profile': profile,
@@ -46,6 +47,8 @@ class EditProfile(LoginRequiredMixin, UpdateView):
             profile.user.first_name = form.cleaned_data['first_name']
             profile.user.last_name = form.cleaned_data['last_name']
             profile.user.save()
+            profile.immediate_notifications = form.cleaned_data['immediate_notifications']
+            profile.save()
             return redirect('roles:detail')
         else:
             context = {